@@ -1,23 +1,85 @@
+import os
+import threading
+import time
 import warnings
-from model import Models
+from model import Models, ADMIN_MODEL_NAME, FASHION_MODEL_NAME, SALES_FRAME_KEYS, SALES_MODEL_NAME, fashion_top_k, safe_plot_name
+from cache import LRUCache
+from holder import ModelHolder
+from order_log import OrderLog
+from metrics import stage, timed
+from startup import lazy_module
 from pathlib import Path
+from typing import Optional
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
 
 warnings.filterwarnings("ignore")
 
+def _normalise_prompt(prompt:str) -> str:
+    # The TF-IDF features ignore case and word order, so neither should split the cache
+    return " ".join(sorted(prompt.lower().split()))
+
 class EcommerceAI:
     def __init__(self):
         print("🤖 Initializing EcommerceAI...")
         self.models = Models()
-        self.fashion_model = None
-        self.sales_model = None
+        # Live models: readers take a snapshot, new models are built aside and published whole
+        self.fashion = ModelHolder(FASHION_MODEL_NAME)
+        self.sales = ModelHolder(SALES_MODEL_NAME)
+        self.admin = ModelHolder(ADMIN_MODEL_NAME)
+        self.sales_source = None
+        # Serialises read-modify-write publishes of sales_model (ingestion, retrains, refreshes)
+        self._sales_lock = threading.Lock()
+        self.order_log = OrderLog(os.getenv("AIZY_ORDER_LOG", "data/sales_orders.jsonl"))
+        # Offset of the first order log byte not yet folded into sales_model
+        self._order_offset = 0
+        # Multi-worker mode: models are shared through the registry and only the leader trains
+        self.shared_store = False
+        self.follower = False
+        self.plot_cache = LRUCache(maxsize=int(os.getenv("AIZY_PLOT_CACHE_SIZE", "64")))
+        self.fashion_cache = LRUCache(
+            maxsize=int(os.getenv("AIZY_FASHION_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("AIZY_FASHION_CACHE_TTL", "3600"))
+        )
         print("✅ EcommerceAI initialized")
 
+    @property
+    def fashion_model(self):
+        return self.fashion.model
+
+    @fashion_model.setter
+    def fashion_model(self, model):
+        self._publish_fashion_model(model)
+
+    @property
+    def sales_model(self):
+        return self.sales.model
 
-    def train_fashion_assistant(self, filepath:str="fashion.csv"):
+    @property
+    def sales_model_version(self):
+        return self.sales.version
+
+    @property
+    def admin_model(self):
+        return self.admin.model
+
+    def _publish_fashion_model(self, model, load_seconds:Optional[float]=None):
+        self.fashion.publish(model, load_seconds=load_seconds)
+        # Predictions are cached per snapshot generation, the old ones can never be hit again
+        self.fashion_cache.clear()
+
+    @timed("EcommerceAI", falsy_is_failure=True)
+    def train_fashion_assistant(self, filepath:str="fashion.csv", engine:Optional[str]=None):
+        started = time.perf_counter()
         try:
             print(f"👗 Training fashion assistant with data from {filepath}")
-            self.fashion_model = self.models.create_fashion_model(filepath)
-            if self.fashion_model:
+            if engine is None:
+                engine = os.getenv("AIZY_FASHION_ENGINE", "forest")
+            # Built off to the side: requests keep using the current model until this one is complete
+            model = self.models.create_fashion_model(filepath, engine)
+            if model:
+                self._publish_fashion_model(model, time.perf_counter() - started)
                 print("✅ Fashion Assistant AI ready.")
                 return True
             else:
@@ -27,27 +89,133 @@ class EcommerceAI:
             print(f"❌ Error training fashion assistant: {e}")
             return False
 
+    @timed("EcommerceAI", falsy_is_failure=True)
+    def load_or_train_fashion_assistant(self, filepath:str="./data/fashion.csv", engine:Optional[str]=None):
+        if engine is None:
+            engine = os.getenv("AIZY_FASHION_ENGINE", "forest")
+        started = time.perf_counter()
+        model = self.models.load_fashion_model(filepath, engine)
+        if model is None:
+            if self.follower:
+                print("⏳ Fashion assistant not published yet, waiting for the leader worker to train it")
+                return False
+            return self.train_fashion_assistant(filepath, engine)
+        self._publish_fashion_model(model, time.perf_counter() - started)
+        print("✅ Fashion Assistant AI ready (loaded from registry).")
+        return True
+
+    def _warm_up_fashion(self, progress_callback=None):
+        print("🔄 Fashion model not in memory, loading or training it...")
+        self.load_or_train_fashion_assistant("./data/fashion.csv")
+
+    def _ensure_fashion_model(self):
+        """Current fashion snapshot; cold callers all wait on one shared load or training run"""
+        return self.fashion.ensure(self._warm_up_fashion)
+
+    def _warm_up_sales(self, progress_callback=None):
+        print("🔄 Sales model not in memory, loading or training it...")
+        self.load_or_train_sales_forecaster("./data/products.csv", progress_callback=progress_callback)
+
+    def _ensure_sales_model(self):
+        return self.sales.ensure(self._warm_up_sales)
+
+    def _warm_up_admin(self, progress_callback=None):
+        print("🔄 Fake account model not in memory, loading or training it...")
+        self.load_or_train_admin_ai("./data/fake_accounts.csv")
+
+    def model_holders(self):
+        """Every lazily loaded model: name -> (holder, warm-up that loads or trains it)"""
+        return {
+            FASHION_MODEL_NAME: (self.fashion, self._warm_up_fashion),
+            SALES_MODEL_NAME: (self.sales, self._warm_up_sales),
+            ADMIN_MODEL_NAME: (self.admin, self._warm_up_admin)
+        }
+
+    def _format_fashion_answer(self, prompt:str, prediction):
+        return f"Based on your request '{prompt}', I recommend: {prediction}"
+
+    @timed("EcommerceAI")
+    def _predict_fashion(self, snapshot, prompts:list):
+        # Keyed on the snapshot generation, so predictions of a replaced model that finish late are never served
+        model, generation = snapshot.model, snapshot.generation
+        keys = [(generation, _normalise_prompt(prompt)) for prompt in prompts]
+        predictions = [self.fashion_cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, prediction in zip(keys, predictions) if prediction is None))
+        if missing:
+            with stage("EcommerceAI", "fashion_model_predict"):
+                fresh = dict(zip(missing, model.predict([key[1] for key in missing])))
+            for key, prediction in fresh.items():
+                self.fashion_cache.set(key, prediction)
+            predictions = [fresh[key] if prediction is None else prediction for key, prediction in zip(keys, predictions)]
+        return predictions
+
     def fashion_assistant(self, prompt:str):
         try:
-            if self.fashion_model is None:
-                print("⚠️ Fashion model not trained, training now...")
-                self.train_fashion_assistant("./data/fashion.csv")
-            
-            if self.fashion_model is None:
+            snapshot = self._ensure_fashion_model()
+            if snapshot is None:
                 return "Fashion assistant is not available. Please train the model first."
             
-            predictions = self.fashion_model.predict([prompt])
-            return f"Based on your request '{prompt}', I recommend: {predictions[0]}"
+            predictions = self._predict_fashion(snapshot, [prompt])
+            return self._format_fashion_answer(prompt, predictions[0])
         except Exception as e:
             print(f"❌ Error in fashion assistant: {e}")
             return f"Sorry, I couldn't process your request: {str(e)}"
 
-    def train_sales_forecaster(self, filepath:str="products.csv", months_to_forecast:int=3):
+    def fashion_assistant_batch(self, prompts:list):
+        # Cache misses go through one vectorizer transform and one pass through the model
+        prompts = list(prompts)
+        if not prompts:
+            return []
+        try:
+            snapshot = self._ensure_fashion_model()
+            if snapshot is None:
+                return ["Fashion assistant is not available. Please train the model first."] * len(prompts)
+
+            predictions = self._predict_fashion(snapshot, prompts)
+            return [self._format_fashion_answer(prompt, prediction) for prompt, prediction in zip(prompts, predictions)]
+        except Exception as e:
+            print(f"❌ Error in fashion assistant batch: {e}")
+            return [f"Sorry, I couldn't process your request: {str(e)}"] * len(prompts)
+
+    def fashion_assistant_with_suggestions(self, prompt:str, k:int=5):
+        """The answer and the k best suggestions from a single ranking pass; the answer is the top suggestion"""
+        try:
+            snapshot = self._ensure_fashion_model()
+            if snapshot is None:
+                return "Fashion assistant is not available. Please train the model first.", []
+            with stage("EcommerceAI", "fashion_model_predict"):
+                ranked = fashion_top_k(snapshot.model, [prompt], k)[0]
+            if ranked:
+                best = ranked[0][0]
+                self.fashion_cache.set((snapshot.generation, _normalise_prompt(prompt)), best)
+            else:
+                # Nothing scored above zero: the model's own fallback answer
+                best = self._predict_fashion(snapshot, [prompt])[0]
+            suggestions = [{"product": str(product), "score": score} for product, score in ranked]
+            return self._format_fashion_answer(prompt, best), suggestions
+        except Exception as e:
+            print(f"❌ Error ranking fashion suggestions: {e}")
+            return f"Sorry, I couldn't process your request: {str(e)}", []
+
+    @timed("EcommerceAI", falsy_is_failure=True)
+    def train_sales_forecaster(self, filepath:str="products.csv", months_to_forecast:int=3, n_jobs:Optional[int]=None, engine:Optional[str]=None, incremental:bool=True, progress_callback=None):
+        started = time.perf_counter()
         try:
             print(f"📈 Training sales forecaster with data from {filepath}")
-            self.sales_model = self.models.create_sales_forecasting_model(filepath, months_to_forecast)
-            if self.sales_model:
-                self.models.create_forecast_visualizations(self.sales_model)
+            if n_jobs is None:
+                n_jobs = int(os.getenv("AIZY_FORECAST_WORKERS", "1"))
+            if engine is None:
+                engine = os.getenv("AIZY_FORECAST_ENGINE", "arima")
+            # Rows per CSV chunk; 0 reads the whole file at once
+            read_chunksize = int(os.getenv("AIZY_CSV_CHUNKSIZE", "0")) or None
+            sales_model = self.models.create_sales_forecasting_model(
+                filepath, months_to_forecast, n_jobs=n_jobs, engine=engine,
+                use_cache=incremental, progress_callback=progress_callback,
+                read_chunksize=read_chunksize
+            )
+            if sales_model:
+                # Plots are rendered on demand by render_forecast_plot, not on every retrain
+                self._publish_sales_model(sales_model, filepath, progress_callback, load_seconds=time.perf_counter() - started)
                 print("✅ Sales Forecaster AI ready.")
                 return True
             else:
@@ -57,27 +225,288 @@ class EcommerceAI:
             print(f"❌ Error training sales forecaster: {e}")
             return False
 
-    def sales_forecaster(self):
+    @timed("EcommerceAI", falsy_is_failure=True)
+    def load_or_train_sales_forecaster(self, filepath:str="./data/products.csv", months_to_forecast:Optional[int]=None, engine:Optional[str]=None, progress_callback=None):
+        """Reuse the newest registry model for filepath (over months_to_forecast when given), else train one"""
+        started = time.perf_counter()
+        model = self.models.load_sales_forecasting_model(filepath, months_to_forecast)
+        if model is None:
+            if self.follower:
+                print("⏳ Sales forecaster not published yet, waiting for the leader worker to train it")
+                return False
+            return self.train_sales_forecaster(filepath, months_to_forecast or 3, engine=engine, progress_callback=progress_callback)
+        offset = self.models.artifacts[SALES_MODEL_NAME].get("order_log_offset", 0)
+        self._publish_sales_model(model, filepath, progress_callback, order_offset=offset,
+                                  load_seconds=time.perf_counter() - started)
+        print("✅ Sales Forecaster AI ready (loaded from registry).")
+        return True
+
+    def _set_sales_model(self, model, load_seconds:Optional[float]=None):
+        metadata = self.models.artifacts.get(SALES_MODEL_NAME)
+        self.sales.publish(model, metadata['version'] if metadata else None, load_seconds)
+        self.plot_cache.clear()
+
+    def _sales_source_hash(self):
+        metadata = self.models.artifacts.get(SALES_MODEL_NAME)
+        if metadata and metadata.get("source_path") == self.sales_source and metadata.get("source_hash"):
+            return metadata["source_hash"]
+        return self.models.registry.file_hash(self.sales_source)
+
+    def _publish_sales_model(self, model, source:str, progress_callback=None, order_offset:int=0, load_seconds:Optional[float]=None):
+        """Publish a freshly trained or loaded model with the orders logged for its source since order_offset replayed on top"""
+        with self._sales_lock:
+            self.sales_source = source
+            orders, self._order_offset = self.order_log.read_range(self._sales_source_hash(), order_offset)
+            if orders:
+                model, summary = self.models.apply_sales_orders(model, orders)
+                print(f"📥 Replayed {summary['accepted']} logged orders onto {source}")
+            self._set_sales_model(model, load_seconds)
+        if model.get('pending_products'):
+            self.refresh_sales_forecasts(progress_callback)
+
+    @timed("EcommerceAI")
+    def ingest_sales_orders(self, orders:list):
+        """Fold new order rows into the live pivots and log them; returns what changed"""
+        if self.sales_model is None:
+            raise Exception("Sales model is not available")
+        with self._sales_lock:
+            updated, summary = self.models.apply_sales_orders(self.sales_model, orders)
+            rejected = set(summary['rejected'])
+            accepted = [order for i, order in enumerate(orders) if i not in rejected]
+            if accepted:
+                # Logged before it is published, so an acknowledged batch survives a restart
+                source_hash = self._sales_source_hash()
+                start, end = self.order_log.append(source_hash, accepted)
+                if start > self._order_offset:
+                    # Batches other workers logged since our last sync go in too; orders are sums, so order is irrelevant
+                    missed, _ = self.order_log.read_range(source_hash, self._order_offset, start)
+                    if missed:
+                        updated, _ = self.models.apply_sales_orders(updated, missed)
+                self._order_offset = end
+                self._set_sales_model(updated)
+        print(f"📥 Ingested {summary['accepted']} orders, {summary['pending_products']} products pending a refit")
+        return summary
+
+    @timed("EcommerceAI", falsy_is_failure=True)
+    def refresh_sales_forecasts(self, progress_callback=None):
+        """Refit the products marked pending by ingestion, then publish if nothing changed meanwhile"""
+        if self.follower:
+            # The leader refits and publishes; followers pick its version up from the registry
+            return True
+        n_jobs = int(os.getenv("AIZY_FORECAST_WORKERS", "1"))
+        while True:
+            model = self.sales_model
+            if model is None or not model.get('pending_products'):
+                return True
+            refreshed = self.models.refresh_sales_forecasting_model(model, n_jobs=n_jobs, progress_callback=progress_callback)
+            if refreshed is None:
+                return False
+            with self._sales_lock:
+                published = self.sales_model is model
+                if published:
+                    self._set_sales_model(refreshed)
+                    source, source_hash, offset = self.sales_source, self._sales_source_hash(), self._order_offset
+            if published:
+                if self.shared_store:
+                    self.models.save_sales_forecasting_model(refreshed, source, source_hash, offset)
+                print("✅ Sales forecasts refreshed with the new orders")
+                return True
+            # More orders landed while fitting: go again, the fit cache keeps the products already refit
+
+    @timed("EcommerceAI")
+    def sync_order_log(self):
+        """Fold in orders other workers logged since the last sync; returns how many"""
+        with self._sales_lock:
+            if self.sales_model is None or self.order_log.size() <= self._order_offset:
+                return 0
+            orders, self._order_offset = self.order_log.read_range(self._sales_source_hash(), self._order_offset)
+            if orders:
+                updated, _ = self.models.apply_sales_orders(self.sales_model, orders)
+                self._set_sales_model(updated)
+        if orders:
+            print(f"📥 Picked up {len(orders)} orders logged by other workers")
+        return len(orders)
+
+    def sync_shared_models(self):
+        """Adopt the model versions and orders other workers published (multi-worker mode)"""
+        started = time.perf_counter()
+        model, _ = self.models.load_published(FASHION_MODEL_NAME)
+        if model is not None:
+            self._publish_fashion_model(model, time.perf_counter() - started)
+        started = time.perf_counter()
+        model, _ = self.models.load_published(ADMIN_MODEL_NAME)
+        if model is not None:
+            self.admin.publish(model, load_seconds=time.perf_counter() - started)
+        started = time.perf_counter()
+        model, metadata = self.models.load_published(SALES_MODEL_NAME)
+        if model is not None:
+            self._publish_sales_model(model, metadata.get("source_path"), order_offset=metadata.get("order_log_offset", 0),
+                                      load_seconds=time.perf_counter() - started)
+        else:
+            self.sync_order_log()
+
+    @timed("EcommerceAI", falsy_is_failure=True)
+    def train_admin_ai(self, filepath:str="./data/fake_accounts.csv"):
+        started = time.perf_counter()
+        try:
+            print(f"🛡️ Training fake account detection with data from {filepath}")
+            model = self.models.create_fake_account_model(filepath)
+            if model:
+                self.admin.publish(model, load_seconds=time.perf_counter() - started)
+                print("✅ Admin AI ready.")
+                return True
+            print("❌ Admin AI training failed.")
+            return False
+        except Exception as e:
+            print(f"❌ Error training admin AI: {e}")
+            return False
+
+    @timed("EcommerceAI", falsy_is_failure=True)
+    def load_or_train_admin_ai(self, filepath:str="./data/fake_accounts.csv"):
+        started = time.perf_counter()
+        model = self.models.load_fake_account_model(filepath)
+        if model is None:
+            if self.follower:
+                print("⏳ Fake account model not published yet, waiting for the leader worker to train it")
+                return False
+            return self.train_admin_ai(filepath)
+        self.admin.publish(model, load_seconds=time.perf_counter() - started)
+        print("✅ Admin AI ready (loaded from registry).")
+        return True
+
+    @timed("EcommerceAI")
+    def score_accounts(self, accounts:list, top:Optional[int]=None, threshold:float=0.5, reasons:int=3):
+        """Fake account risk for a batch of account records in one pass, riskiest first"""
+        snapshot = self.admin.ensure(self._warm_up_admin)
+        if snapshot is None:
+            raise Exception("Fake account model is not available, train it with /ai/admin/train first")
+        detector = snapshot.model
+        frame = pd.DataFrame.from_records(accounts)
+        with stage("EcommerceAI", "fake_account_predict"):
+            risk, explained = detector.score(frame, reasons)
+        order = np.argsort(-risk, kind="stable")
+        if top:
+            order = order[:top]
+        id_column = next((c for c in ("id", "user_id", "userId", "account_id", "accountId") if c in frame.columns), None)
+        ids = frame[id_column].tolist() if id_column else None
+        return {
+            "model_version": snapshot.version,
+            "scored": len(frame),
+            "flagged": int((risk >= threshold).sum()),
+            "threshold": threshold,
+            "results": [
+                {
+                    "index": int(i),
+                    "id": ids[i] if ids is not None else None,
+                    "risk": round(float(risk[i]), 4),
+                    "flagged": bool(risk[i] >= threshold),
+                    "reasons": explained[i]
+                }
+                for i in order
+            ]
+        }
+
+    @timed("EcommerceAI")
+    def render_forecast_plot(self, plot_name:str, fmt:str="png", dpi:int=100):
+        """Render (or fetch from cache) 'comprehensive_seller_analysis' or '<product>_detailed_analysis'"""
+        snapshot = self._ensure_sales_model()
+        if snapshot is None:
+            return None
+        model, version = snapshot.model, snapshot.version
+        key = (version, plot_name, fmt, dpi)
+        image = self.plot_cache.get(key)
+        if image is not None:
+            return image, version
+        if plot_name == "comprehensive_seller_analysis":
+            image = self.models.render_comprehensive_plot(model, fmt, dpi)
+        elif plot_name.endswith("_detailed_analysis"):
+            safe_name = plot_name[:-len("_detailed_analysis")]
+            product = next((p for p in model['sales_data'].columns if safe_plot_name(p) == safe_name), None)
+            image = self.models.render_product_plot(product, model, fmt, dpi) if product is not None else None
+        if image is None:
+            return None
+        self.plot_cache.set(key, image)
+        return image, version
+
+    @timed("EcommerceAI")
+    def sales_series(self, products:Optional[list]=None, offset:int=0, limit:int=50, max_points:Optional[int]=None):
+        """Monthly history and forecast per product as compact columnar arrays"""
+        snapshot = self._ensure_sales_model()
+        if snapshot is None:
+            raise Exception("Sales model is not available")
+        model = snapshot.model
+        sales_data, profit_data = model['sales_data'], model['profit_data']
+        sales_forecast = model.get('sales_forecast_data')
+        profit_forecast = model.get('profit_forecast_data')
+
+        known = list(sales_data.columns)
+        missing = []
+        if products:
+            missing = [p for p in products if p not in sales_data.columns]
+            known = [p for p in products if p in sales_data.columns]
+        page = known[offset:offset + limit]
+
+        index = sales_data.index
+        buckets = None
+        if max_points and 0 < max_points < len(index):
+            # Downsample by averaging consecutive months into max_points buckets
+            buckets = np.array_split(np.arange(len(index)), max_points)
+            index = index[[bucket[0] for bucket in buckets]]
+
+        def history(frame, product):
+            values = frame[product].to_numpy(dtype=float)
+            if buckets is not None:
+                values = np.array([values[bucket].mean() for bucket in buckets])
+            return np.round(values, 2).tolist()
+
+        def forecast(frame, product):
+            if frame is None or product not in frame.columns:
+                return []
+            return np.round(frame[product].to_numpy(dtype=float), 2).tolist()
+
+        return {
+            "index": [d.strftime("%Y-%m-%d") for d in index],
+            "forecast_index": [d.strftime("%Y-%m-%d") for d in sales_forecast.index] if sales_forecast is not None else [],
+            "products": page,
+            "sales": [history(sales_data, p) for p in page],
+            "profit": [history(profit_data, p) for p in page],
+            "sales_forecast": [forecast(sales_forecast, p) for p in page],
+            "profit_forecast": [forecast(profit_forecast, p) for p in page],
+            "total_products": len(known),
+            "offset": offset,
+            "limit": limit,
+            "missing": missing
+        }
+
+    def sales_forecaster(self, months:Optional[int]=None):
+        return self.sales_forecast_snapshot(months)[1]
+
+    @timed("EcommerceAI")
+    def sales_forecast_snapshot(self, months:Optional[int]=None):
+        """
+        (model version, forecast summary) read from a single model snapshot. `months` re-projects
+        the fitted per-product states over another horizon instead of the trained one
+        """
         try:
             print("📊 Generating sales forecast...")
             
-            if self.sales_model is None:
-                print("⚠️ Sales model not trained, training now...")
-                if not self.train_sales_forecaster("./data/products.csv"):
-                    raise Exception("Failed to train sales model")
-            
-            if self.sales_model is None:
-                raise Exception("Sales model is unexpectedly None prior to forecasting.")
+            snapshot = self._ensure_sales_model()
+            if snapshot is None:
+                raise Exception("Failed to train sales model")
 
-            forecast_data = self.sales_model.copy()
-            
-            if 'sales_data' in forecast_data:
-                del forecast_data['sales_data']
-            if 'profit_data' in forecast_data:
-                del forecast_data['profit_data']
+            model, version = snapshot.model, snapshot.version
+            if months is not None:
+                model = self.models.forecast_horizon(model, months)
+            forecast_data = {key: value for key, value in model.items() if key not in SALES_FRAME_KEYS}
+            sales_paths, profit_paths = model.get('sales_forecast_data'), model.get('profit_forecast_data')
+            if sales_paths is not None and profit_paths is not None:
+                # Month-by-month paths next to the per-product totals
+                forecast_data['forecast_index'] = [d.strftime("%Y-%m-%d") for d in sales_paths.index]
+                forecast_data['sales_paths'] = sales_paths.round(2).to_dict('list')
+                forecast_data['profit_paths'] = profit_paths.round(2).to_dict('list')
                 
             print("✅ Sales forecast generated successfully")
-            return forecast_data
+            return version, forecast_data
             
         except Exception as e:
             print(f"❌ Error in sales forecaster: {e}")
@@ -117,6 +546,7 @@ if __name__ == "__main__":
     print("🔄 Training sales forecasting model...")
     
     ai.train_sales_forecaster("./data/products.csv", months_to_forecast=12)
+    ai.models.create_forecast_visualizations(ai.sales_model)
     
     forecast_results = ai.sales_forecaster()
     
@@ -0,0 +1,23 @@
+"""
+Admin authentication
+Admin endpoints need an X-Admin-Token header matching AIZY_ADMIN_TOKEN. Without a configured
+token they are disabled rather than open
+"""
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+ADMIN_TOKEN = os.getenv("AIZY_ADMIN_TOKEN") or None
+
+def admin_token_matches(token:Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """FastAPI dependency for admin-only endpoints: 503 when no token is configured, 401 on a missing or wrong one"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled, set AIZY_ADMIN_TOKEN to enable them")
+    if not admin_token_matches(x_admin_token):
+        raise HTTPException(status_code=401, detail="Missing or wrong X-Admin-Token",
+                            headers={"WWW-Authenticate": "X-Admin-Token"})
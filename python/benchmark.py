@@ -0,0 +1,197 @@
+"""
+Benchmarks for the training and inference hot paths
+Generates synthetic data at several sizes, times each stage in a scratch directory,
+writes the timings as JSON and compares them against a stored baseline
+
+    python benchmark.py                                  # small + medium, compare to benchmarks/baseline.json
+    python benchmark.py --sizes small --save-baseline    # record a new baseline
+    python benchmark.py --tolerance 0.5 --output out.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+# Measure the real work: no parsed-data cache, no prediction cache
+os.environ["AIZY_DATA_CACHE"] = "0"
+os.environ["AIZY_FASHION_CACHE_SIZE"] = "0"
+
+import numpy as np
+import pandas as pd
+from ai import EcommerceAI
+from dummy_dataset import Dummy_Dataset
+
+DEFAULT_BASELINE = os.path.join(HERE, "benchmarks", "baseline.json")
+DEFAULT_OUTPUT = os.path.join(HERE, "benchmarks", "results.json")
+
+SIZES = {
+    "small": {"products": 20, "months": 24, "orders_per_month": 4, "fashion_rows": 500, "prompts": 200},
+    "medium": {"products": 100, "months": 48, "orders_per_month": 6, "fashion_rows": 2000, "prompts": 500},
+    "large": {"products": 400, "months": 72, "orders_per_month": 8, "fashion_rows": 10000, "prompts": 2000},
+}
+
+def _quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+def _generate_sales_csv(path:str, products:int, months:int, orders_per_month:int, seed:int):
+    """Orders with dd-mm-yyyy dates like data/products.csv, so the date parsing path is exercised"""
+    _quiet(Dummy_Dataset(seed)._create_dummy_sales_data, path, n_products=products, days=months * 30,
+           rows_per_day=max(1, products * orders_per_month // 30), start_date="2020-01-01", date_format="%d-%m-%Y")
+
+def _generate_fashion_csv(path:str, rows:int, seed:int):
+    _quiet(Dummy_Dataset(seed)._create_dummy_fashion_data, path, rows)
+
+def _prompts(count:int, seed:int):
+    rng = np.random.default_rng(seed + 1)
+    return [
+        f"Suggest {category} for a {gender} for a {occasion} in {region}"
+        for category, gender, occasion, region in zip(
+            rng.choice(Dummy_Dataset.CATEGORIES, count), rng.choice(Dummy_Dataset.GENDERS, count),
+            rng.choice(Dummy_Dataset.OCCASIONS, count), rng.choice(Dummy_Dataset.REGIONS, count))
+    ]
+
+def _timed(fn, repeat:int, verbose:bool):
+    """Best wall time of `repeat` runs (the least disturbed one) and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def run_size(name:str, size:dict, repeat:int, seed:int, engines, verbose:bool):
+    results = {}
+
+    def record(stage, seconds, **params):
+        results[f"{name}/{stage}"] = {"seconds": round(seconds, 6), "params": params}
+        print(f"  {name}/{stage:<44} {seconds * 1000:>10.1f} ms")
+
+    fashion_path = os.path.abspath("fashion.csv")
+    sales_path = os.path.abspath("products.csv")
+    _generate_fashion_csv(fashion_path, size["fashion_rows"], seed)
+    _generate_sales_csv(sales_path, size["products"], size["months"], size["orders_per_month"], seed)
+    prompts = _prompts(size["prompts"], seed)
+    ai = EcommerceAI() if verbose else _quiet(EcommerceAI)
+
+    for engine in ("forest", "similarity"):
+        seconds, model = _timed(lambda: ai.models.create_fashion_model(fashion_path, engine), repeat, verbose)
+        record(f"create_fashion_model[{engine}]", seconds, rows=size["fashion_rows"])
+        # Publishing clears the prediction cache, so every engine starts cold
+        ai.fashion_model = model
+        seconds, _ = _timed(lambda: [ai.fashion_assistant(p) for p in prompts], repeat, verbose)
+        record(f"fashion_assistant_single[{engine}]", seconds, prompts=len(prompts))
+        seconds, _ = _timed(lambda: ai.fashion_assistant_batch(prompts), repeat, verbose)
+        record(f"fashion_assistant_batch[{engine}]", seconds, prompts=len(prompts))
+
+    shape = {"products": size["products"], "months": size["months"]}
+    seconds, _ = _timed(lambda: ai.models.create_sales_data_preprocessor(sales_path), repeat, verbose)
+    record("create_sales_data_preprocessor", seconds, orders=size["products"] * size["months"] * size["orders_per_month"])
+
+    forecast = None
+    for engine in engines:
+        seconds, forecast = _timed(lambda: ai.models.create_sales_forecasting_model(
+            sales_path, 3, engine=engine, use_cache=False), repeat, verbose)
+        record(f"create_sales_forecasting_model[{engine}]", seconds, **shape)
+    if forecast:
+        seconds, _ = _timed(lambda: ai.models.create_forecast_visualizations(forecast), repeat, verbose)
+        record("create_forecast_visualizations", seconds, **shape)
+    return results
+
+def compare(results:dict, baseline:dict, tolerance:float, min_delta:float):
+    """Stages slower than baseline * (1 + tolerance), ignoring differences under min_delta seconds"""
+    regressions = []
+    print(f"\n{'stage':<50} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for key, entry in results.items():
+        before = baseline.get(key)
+        if before is None:
+            print(f"{key:<50} {'-':>10} {entry['seconds']:>10.4f} {'new':>7}")
+            continue
+        ratio = entry["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+        regressed = ratio > 1 + tolerance and entry["seconds"] - before["seconds"] > min_delta
+        flag = "  ❌" if regressed else ""
+        print(f"{key:<50} {before['seconds']:>10.4f} {entry['seconds']:>10.4f} {ratio:>7.2f}{flag}")
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Aizy training and inference hot paths")
+    parser.add_argument("--sizes", default="small,medium", help=f"comma separated, from {', '.join(SIZES)}")
+    parser.add_argument("--engines", default="arima", help="forecasting engines to time, comma separated")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage, the best one is kept")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a stage counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the code under test")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes {unknown}, choose from {list(SIZES)}")
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+
+    results = {}
+    started = time.time()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="aizy-bench-") as scratch:
+        # Models writes models/ and plots/ relative to the working directory
+        os.chdir(scratch)
+        try:
+            for name in sizes:
+                print(f"\n📏 {name}: {SIZES[name]}")
+                results.update(run_size(name, SIZES[name], args.repeat, args.seed, engines, args.verbose))
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "created_at": started,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "repeat": args.repeat,
+            "seed": args.seed
+        },
+        "results": results
+    }
+    targets = [args.output] + ([args.baseline] if args.save_baseline else [])
+    for target in targets:
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        with open(target, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Wrote {target}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        if not args.save_baseline:
+            print(f"ℹ️ No baseline at {args.baseline}, run with --save-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get("results", {}), args.tolerance, args.min_delta)
+    if regressions:
+        print(f"\n❌ {len(regressions)} stage(s) slower than the baseline by more than {args.tolerance:.0%}")
+        return 1
+    print("\n✅ No regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+On-disk cache of parsed training data
+Stores the typed arrays derived from a CSV (monthly pivots, fashion features) as
+.npz files keyed on the source path, size and mtime, so a retrain or a restart
+skips the CSV parsing and date guessing entirely
+"""
+import hashlib
+import os
+from typing import Optional
+from startup import lazy_module
+
+np = lazy_module("numpy")
+
+class ParsedDataCache:
+    def __init__(self, root:str="models/data_cache", enabled:bool=True):
+        self.root = root
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def signature(path:str):
+        stat = os.stat(path)
+        return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def _entry_path(self, path:str, kind:str) -> str:
+        # One entry per source file and kind: a newer parse simply replaces the old one
+        digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+        return os.path.join(self.root, f"{kind}-{digest}.npz")
+
+    def load(self, path:str, kind:str) -> Optional[dict]:
+        """Arrays saved for `path`, or None when missing or the file changed since"""
+        if not self.enabled or not os.path.exists(path):
+            return None
+        entry = self._entry_path(path, kind)
+        try:
+            with np.load(entry, allow_pickle=False) as data:
+                if not np.array_equal(data["__signature__"], self.signature(path)):
+                    self.misses += 1
+                    return None
+                arrays = {name: data[name] for name in data.files if name != "__signature__"}
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable data cache {entry}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def save(self, path:str, kind:str, arrays:dict):
+        if not self.enabled:
+            return
+        if any(np.asarray(array).dtype.hasobject for array in arrays.values()):
+            # Only plain typed arrays are cached, they load back without pickle
+            return
+        entry = self._entry_path(path, kind)
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = f"{entry}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, __signature__=self.signature(path), **arrays)
+            os.replace(tmp_path, entry)
+        except Exception as e:
+            print(f"⚠️ Could not write data cache {entry}: {e}")
+
+    def stats(self):
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses}
+
+def frame_to_arrays(prefix:str, frame) -> dict:
+    """
+    Datetime-indexed frame with a single numeric dtype (e.g. a monthly pivot) as plain typed arrays.
+    Column labels keep their type: all strings or all numbers round-trip, mixed labels stay an
+    object array, which save() refuses, so such a frame is parsed again instead of coming back as str
+    """
+    if all(isinstance(label, str) for label in frame.columns):
+        columns = np.asarray(list(frame.columns), dtype=str)
+    else:
+        columns = frame.columns.to_numpy()
+    return {
+        f"{prefix}.values": frame.to_numpy(),
+        f"{prefix}.index": frame.index.to_numpy(),
+        f"{prefix}.columns": columns,
+        f"{prefix}.names": np.asarray([frame.index.name or "", frame.columns.name or ""])
+    }
+
+def frame_from_arrays(prefix:str, arrays:dict):
+    import pandas as pd
+    index_name, columns_name = (str(name) or None for name in arrays[f"{prefix}.names"])
+    return pd.DataFrame(
+        arrays[f"{prefix}.values"],
+        index=pd.DatetimeIndex(arrays[f"{prefix}.index"], name=index_name),
+        columns=pd.Index(arrays[f"{prefix}.columns"].tolist(), name=columns_name)
+    )
@@ -1,67 +1,240 @@
-import random
+import argparse
+import csv
+import io
 import numpy as np
 import pandas as pd
 import os
 from datetime import datetime, timedelta
+from typing import Optional
+
+#? Rows are generated and written one block at a time, so memory stays flat for any dataset size
+DEFAULT_CHUNK_ROWS = 1_000_000
 
 class Dummy_Dataset:
-    def __init__(self):
-        pass
-
-    def _create_dummy_fashion_data(self, filepath):
-        categories = ['Shirts', 'Dresses', 'Jeans', 'Shoes', 'Accessories', 'Jackets', 'Skirts', 'Bags']
-        genders = ['Male', 'Female', 'Unisex']
-        regions = ['North', 'South', 'East', 'West', 'Central']
-        occasions = ['Casual', 'Formal', 'Party', 'Wedding', 'Office', 'Sports', 'Beach']
-        
-        dummy_data = []
-        for i in range(200):
-            category = np.random.choice(categories)
-            gender = np.random.choice(genders)
-            region = np.random.choice(regions)
-            occasion = np.random.choice(occasions)
-            product_name = f"{gender} {category} for {occasion}"
-            
-            dummy_data.append({
-                'category': category,
-                'gender': gender,
-                'region': region,
-                'occasion': occasion,
-                'product_name': product_name
-            })
-        
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        pd.DataFrame(dummy_data).to_csv(filepath, index=False)
-        print(f"✅ Dummy fashion data created at '{filepath}'")
-
-    def _create_dummy_sales_data(self, filepath):
-        products = [
-            'Summer Dress', 'Winter Jacket', 'Running Shoes', 'Casual Shirt',
-            'Formal Pants', 'Handbag', 'Sunglasses', 'Watch', 'Sneakers',
-            'T-Shirt', 'Jeans', 'Blazer', 'Sandals', 'Backpack', 'Scarf'
-        ]
-        
-        # Create 12 months of data
-        start_date = datetime.now() - timedelta(days=365)
-        dummy_data = []
-        
-        for i in range(365):
-            current_date = start_date + timedelta(days=i)
-            for product in products:
-                # Simulate seasonal trends
-                base_sales = random.randint(100, 1000)
-                seasonal_factor = 1 + 0.3 * np.sin(2 * np.pi * i / 365)
-                
-                sales = int(base_sales * seasonal_factor)
-                profit = sales * random.uniform(0.15, 0.35)  # 15-35% profit margin
-                
-                dummy_data.append({
-                    'date': current_date.strftime('%Y-%m-%d'),
-                    'product_name': product,
+    BASE_PRODUCTS = [
+        'Summer Dress', 'Winter Jacket', 'Running Shoes', 'Casual Shirt',
+        'Formal Pants', 'Handbag', 'Sunglasses', 'Watch', 'Sneakers',
+        'T-Shirt', 'Jeans', 'Blazer', 'Sandals', 'Backpack', 'Scarf'
+    ]
+    CATEGORIES = ['Shirts', 'Dresses', 'Jeans', 'Shoes', 'Accessories', 'Jackets', 'Skirts', 'Bags']
+    GENDERS = ['Male', 'Female', 'Unisex']
+    REGIONS = ['North', 'South', 'East', 'West', 'Central']
+    OCCASIONS = ['Casual', 'Formal', 'Party', 'Wedding', 'Office', 'Sports', 'Beach']
+    FIRST_NAMES = ['Aarav', 'Maya', 'Liam', 'Sofia', 'Noah', 'Zara', 'Ethan', 'Amara', 'Lucas', 'Priya', 'Omar', 'Hana']
+    LAST_NAMES = ['Sharma', 'Smith', 'Khan', 'Garcia', 'Chen', 'Okafor', 'Muller', 'Silva', 'Ito', 'Haddad']
+    EMAIL_DOMAINS = ['gmail.com', 'outlook.com', 'yahoo.com', 'icloud.com', 'proton.me']
+    DISPOSABLE_DOMAINS = ['mailinator.com', 'yopmail.com', 'tempmail.com', 'guerrillamail.com']
+    SIGNUP_SOURCES = ['web', 'android', 'ios', 'referral']
+
+    def __init__(self, seed:Optional[int]=None):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def product_names(cls, n_products:int):
+        names = cls.BASE_PRODUCTS[:n_products]
+        for i in range(len(names), n_products):
+            names.append(f"{cls.BASE_PRODUCTS[i % len(cls.BASE_PRODUCTS)]} #{i // len(cls.BASE_PRODUCTS) + 1}")
+        return np.array(names)
+
+    def _create_dummy_fashion_data(self, filepath, rows:int=200, chunk_rows:int=DEFAULT_CHUNK_ROWS):
+        # Every column is categorical: the product name is looked up from the combination of codes
+        combos = pd.MultiIndex.from_product([self.GENDERS, self.CATEGORIES, self.OCCASIONS])
+        product_names = [f"{gender} {category} for {occasion}" for gender, category, occasion in combos]
+
+        def chunks():
+            for start in range(0, rows, chunk_rows):
+                n = min(chunk_rows, rows - start)
+                category = self.rng.integers(0, len(self.CATEGORIES), n)
+                gender = self.rng.integers(0, len(self.GENDERS), n)
+                region = self.rng.integers(0, len(self.REGIONS), n)
+                occasion = self.rng.integers(0, len(self.OCCASIONS), n)
+                combo = (gender * len(self.CATEGORIES) + category) * len(self.OCCASIONS) + occasion
+                yield pd.DataFrame({
+                    'category': pd.Categorical.from_codes(category, self.CATEGORIES),
+                    'gender': pd.Categorical.from_codes(gender, self.GENDERS),
+                    'region': pd.Categorical.from_codes(region, self.REGIONS),
+                    'occasion': pd.Categorical.from_codes(occasion, self.OCCASIONS),
+                    'product_name': pd.Categorical.from_codes(combo, product_names)
+                })
+
+        written = self._write_chunks(filepath, chunks())
+        if written is not None:
+            print(f"✅ Dummy fashion data created at '{filepath}' ({written} rows)")
+        return written
+
+    def _create_dummy_sales_data(self, filepath, n_products:int=15, days:int=365, rows_per_day:Optional[int]=None,
+                                 start_date:Optional[str]=None, seasonality:float=0.3, noise:float=0.8,
+                                 date_format:str='%Y-%m-%d', chunk_rows:int=DEFAULT_CHUNK_ROWS):
+        """
+        Daily orders over `days` days. Without rows_per_day every product sells once a day;
+        with it, each day gets that many orders spread over the catalogue by a long-tailed popularity.
+        seasonality is the amplitude of the yearly cycle and noise the relative spread of each order.
+        """
+        products = self.product_names(n_products)
+        start = pd.Timestamp(start_date) if start_date else pd.Timestamp(datetime.now() - timedelta(days=days))
+        # Dates are formatted once per day and referenced by code, strftime never runs per order
+        day_labels = pd.date_range(start.normalize(), periods=days, freq='D').strftime(date_format)
+        seasonal = 1 + seasonality * np.sin(2 * np.pi * np.arange(days) / 365)
+        base_sales = self.rng.uniform(100, 1000, n_products)
+        popularity = np.cumsum(1 / np.arange(1, n_products + 1))
+        popularity /= popularity[-1]
+        per_day = rows_per_day or n_products
+        chunk_days = max(1, chunk_rows // per_day)
+
+        def chunks():
+            for first_day in range(0, days, chunk_days):
+                block = min(chunk_days, days - first_day)
+                day = np.repeat(np.arange(first_day, first_day + block), per_day)
+                if rows_per_day is None:
+                    product = np.tile(np.arange(n_products), block)
+                else:
+                    product = np.searchsorted(popularity, self.rng.random(day.size))
+                spread = self.rng.uniform(1 - noise, 1 + noise, day.size)
+                sales = np.maximum(base_sales[product] * seasonal[day] * spread, 0).astype(np.int64)
+                profit = np.round(sales * self.rng.uniform(0.15, 0.35, day.size), 2)  # 15-35% profit margin
+                yield pd.DataFrame({
+                    'date': pd.Categorical.from_codes(day, day_labels),
+                    'product_name': pd.Categorical.from_codes(product, products),
                     'sales': sales,
-                    'profit': round(profit, 2)
+                    'profit': profit
                 })
-        
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        pd.DataFrame(dummy_data).to_csv(filepath, index=False)
-        print(f"✅ Dummy sales data created at '{filepath}'")
\ No newline at end of file
+
+        written = self._write_chunks(filepath, chunks())
+        if written is not None:
+            print(f"✅ Dummy sales data created at '{filepath}' ({written} rows)")
+        return written
+
+    def _create_dummy_fake_account_data(self, filepath, rows:int=5000, fake_ratio:float=0.1,
+                                        chunk_rows:int=DEFAULT_CHUNK_ROWS):
+        """User accounts labelled is_fake: fakes are young, buy little, review a lot and use throwaway emails"""
+        now = pd.Timestamp.now(tz='UTC').floor('s')
+
+        def chunks():
+            for start in range(0, rows, chunk_rows):
+                n = min(chunk_rows, rows - start)
+                fake = self.rng.random(n) < fake_ratio
+                first = self.rng.integers(0, len(self.FIRST_NAMES), n)
+                last = self.rng.integers(0, len(self.LAST_NAMES), n)
+                first_names = np.asarray(self.FIRST_NAMES, dtype=object)[first]
+                last_names = np.asarray(self.LAST_NAMES, dtype=object)[last]
+                # Fakes mostly get a random handle with digits, genuine users their own name
+                handle = np.where(fake & (self.rng.random(n) < 0.8),
+                                  np.char.add("user", self.rng.integers(1000, 999999, n).astype(str)).astype(object),
+                                  np.char.lower((first_names + "." + last_names).astype(str)).astype(object))
+                domains = np.where(fake & (self.rng.random(n) < 0.6),
+                                   np.asarray(self.DISPOSABLE_DOMAINS, dtype=object)[self.rng.integers(0, len(self.DISPOSABLE_DOMAINS), n)],
+                                   np.asarray(self.EMAIL_DOMAINS, dtype=object)[self.rng.integers(0, len(self.EMAIL_DOMAINS), n)])
+                age_days = np.where(fake, self.rng.exponential(10, n), self.rng.uniform(1, 1500, n))
+                orders = np.where(fake, self.rng.poisson(0.3, n), self.rng.poisson(6, n))
+                reviews = np.where(fake, self.rng.poisson(8, n), self.rng.poisson(1.5, n))
+                rating = np.where(fake, self.rng.choice([1.0, 5.0], n), np.round(self.rng.uniform(2.5, 5.0, n), 1))
+                yield pd.DataFrame({
+                    'id': np.arange(start + 1, start + n + 1),
+                    'email': handle + "@" + domains,
+                    'name': np.where(fake & (self.rng.random(n) < 0.5), handle, first_names + " " + last_names),
+                    'role': pd.Categorical.from_codes(np.zeros(n, dtype=int), ['user']),
+                    'created_at': (now - pd.to_timedelta(age_days, unit='D')).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'signup_source': pd.Categorical.from_codes(self.rng.integers(0, len(self.SIGNUP_SOURCES), n), self.SIGNUP_SOURCES),
+                    'orders_count': orders,
+                    'total_spent': np.round(orders * self.rng.uniform(15, 120, n), 2),
+                    'reviews_count': reviews,
+                    'avg_review_rating': np.where(reviews > 0, rating, np.nan),
+                    'failed_logins': np.where(fake, self.rng.poisson(4, n), self.rng.poisson(0.3, n)),
+                    'has_profile_picture': (self.rng.random(n) < np.where(fake, 0.1, 0.7)).astype(int),
+                    'is_fake': fake.astype(int)
+                })
+
+        written = self._write_chunks(filepath, chunks())
+        if written is not None:
+            print(f"✅ Dummy fake account data created at '{filepath}' ({written} rows)")
+        return written
+
+    @staticmethod
+    def _write_chunks(filepath, chunks):
+        """CSV, or Parquet when the path ends in .parquet (needs pyarrow); returns the rows written"""
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        written = 0
+        if str(filepath).endswith('.parquet'):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                print("❌ Writing Parquet needs pyarrow, install it or use a .csv path.")
+                return None
+            writer = None
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(filepath, table.schema)
+                    writer.write_table(table)
+                    written += len(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+            return written
+        with open(filepath, 'w', newline='') as f:
+            for chunk in chunks:
+                if written == 0:
+                    f.write(Dummy_Dataset._csv_line(chunk.columns) + "\n")
+                Dummy_Dataset._write_csv_chunk(f, chunk)
+                written += len(chunk)
+        return written
+
+    @staticmethod
+    def _csv_line(values):
+        # The writer only quotes embedded newlines when "\n" is its line terminator, so strip it after
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(values)
+        return buffer.getvalue()[:-1]
+
+    @staticmethod
+    def _write_csv_chunk(f, chunk):
+        # About twice as fast as DataFrame.to_csv: categories and strings are quoted once per distinct
+        # value, numbers use str(). Code -1 (missing) picks the trailing empty field, like to_csv
+        columns = []
+        for name in chunk.columns:
+            column = chunk[name]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                labels = [Dummy_Dataset._csv_line([label]) for label in column.cat.categories] + [""]
+                columns.append([labels[code] for code in column.cat.codes.tolist()])
+            elif column.dtype == object or isinstance(column.dtype, pd.StringDtype):
+                codes, uniques = pd.factorize(column)
+                labels = [Dummy_Dataset._csv_line([label]) for label in uniques.tolist()] + [""]
+                columns.append([labels[code] for code in codes.tolist()])
+            elif column.dtype.kind == 'f' and column.isna().any():
+                # Missing values as empty fields, like to_csv
+                columns.append(["" if value != value else str(value) for value in column.tolist()])
+            else:
+                columns.append(map(str, column.tolist()))
+        f.write("\n".join(map(",".join, zip(*columns))))
+        f.write("\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic fashion or sales datasets")
+    parser.add_argument("kind", choices=["fashion", "sales", "accounts"])
+    parser.add_argument("filepath", help="output .csv (or .parquet with pyarrow installed)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=None, help="fashion rows (default 200) or accounts (default 5000)")
+    parser.add_argument("--fake-ratio", type=float, default=0.1, help="share of fake accounts")
+    parser.add_argument("--products", type=int, default=15)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--rows-per-day", type=int, default=None, help="orders per day (default: one per product)")
+    parser.add_argument("--start-date", default=None)
+    parser.add_argument("--seasonality", type=float, default=0.3)
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--date-format", default="%Y-%m-%d")
+    args = parser.parse_args()
+
+    dataset = Dummy_Dataset(seed=args.seed)
+    if args.kind == "fashion":
+        dataset._create_dummy_fashion_data(args.filepath, rows=args.rows or 200)
+    elif args.kind == "accounts":
+        dataset._create_dummy_fake_account_data(args.filepath, rows=args.rows or 5000, fake_ratio=args.fake_ratio)
+    else:
+        dataset._create_dummy_sales_data(args.filepath, n_products=args.products, days=args.days,
+                                         rows_per_day=args.rows_per_day, start_date=args.start_date,
+                                         seasonality=args.seasonality, noise=args.noise, date_format=args.date_format)
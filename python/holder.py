@@ -0,0 +1,123 @@
+"""
+Holders for the live models
+A holder publishes immutable snapshots by swapping one reference, so readers take a
+consistent (model, version) pair without locking, and cold starts share one warm-up
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, NamedTuple, Optional
+
+class ModelSnapshot(NamedTuple):
+    model: Any
+    version: str
+    # Bumped on every publish, for caches keyed on "this exact model"
+    generation: int
+    # Wall time of the load or training run behind the model, carried over by in-place updates
+    load_seconds: Optional[float] = None
+
+class ModelHolder:
+    def __init__(self, name:str):
+        self.name = name
+        self._snapshot: Optional[ModelSnapshot] = None
+        self._generation = 0
+        self._publish_lock = threading.Lock()
+        self._warmup_lock = threading.Lock()
+        self._warmup: Optional[Future] = None
+        self.warmups = 0
+        self.warmup_waiters = 0
+        self.evictions = 0
+        self.last_used = time.monotonic()
+        # on_publish(name, snapshot) runs after every publish, e.g. to enforce a memory budget
+        self.on_publish = None
+
+    def get(self) -> Optional[ModelSnapshot]:
+        """The current snapshot; hold on to it for the whole request instead of re-reading"""
+        self.last_used = time.monotonic()
+        return self._snapshot
+
+    def peek(self) -> Optional[ModelSnapshot]:
+        """The current snapshot without counting as a use (for stats and eviction)"""
+        return self._snapshot
+
+    @property
+    def model(self):
+        snapshot = self.get()
+        return snapshot.model if snapshot is not None else None
+
+    @property
+    def version(self) -> Optional[str]:
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+    def publish(self, model, tag=None, load_seconds:Optional[float]=None) -> ModelSnapshot:
+        """
+        Make a fully built model the current one; readers of the previous snapshot are unaffected.
+        The version is the generation, prefixed with tag (e.g. the registry version) when given
+        """
+        with self._publish_lock:
+            self._generation += 1
+            version = f"{tag}.{self._generation}" if tag is not None else str(self._generation)
+            if load_seconds is None and self._snapshot is not None:
+                load_seconds = self._snapshot.load_seconds
+            snapshot = ModelSnapshot(model, version, self._generation, load_seconds)
+            self._snapshot = snapshot
+            self.last_used = time.monotonic()
+        if self.on_publish is not None:
+            self.on_publish(self.name, snapshot)
+        return snapshot
+
+    def evict(self) -> bool:
+        """Drop the current model; requests holding its snapshot finish on it, the next one reloads"""
+        with self._publish_lock:
+            if self._snapshot is None:
+                return False
+            self._snapshot = None
+            self.evictions += 1
+        return True
+
+    def ensure(self, warm_up, timeout:Optional[float]=None) -> Optional[ModelSnapshot]:
+        """
+        The current snapshot, warming up with warm_up() first when there is none.
+        Concurrent callers share a single warm_up() run; None if it published nothing
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._warmup_lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+            future = self._warmup
+            owner = future is None
+            if owner:
+                future = self._warmup = Future()
+                self.warmups += 1
+            else:
+                self.warmup_waiters += 1
+        if not owner:
+            future.result(timeout)
+            return self._snapshot
+        try:
+            warm_up()
+            future.set_result(None)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._warmup_lock:
+                self._warmup = None
+        return self._snapshot
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "version": snapshot.version if snapshot is not None else None,
+            "generation": snapshot.generation if snapshot is not None else 0,
+            "load_seconds": snapshot.load_seconds if snapshot is not None else None,
+            "idle_seconds": round(time.monotonic() - self.last_used, 3),
+            "warmups": self.warmups,
+            "warmup_waiters": self.warmup_waiters,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,97 @@
+"""
+Bounded thread pool for model inference
+Keeps predictions off the event loop, caps in-flight work and sheds load with 503s
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class InferenceOverloaded(Exception):
+    pass
+
+class InferencePool:
+    def __init__(self, workers:int=4, max_in_flight:int=0, max_queue:int=64, queue_timeout:float=2.0):
+        self.workers = max(1, workers)
+        self.max_in_flight = max_in_flight if max_in_flight > 0 else self.workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="aizy-infer")
+        self._slots = None
+        self._waiting = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.total_queue_seconds = 0.0
+        self.total_compute_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.max_compute_seconds = 0.0
+
+    @staticmethod
+    def _timed(fn, args):
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - started
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool; returns (result, timing) or raises InferenceOverloaded"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        enqueued = time.perf_counter()
+        if not self._slots.locked():
+            # A free slot is taken without suspending, so the counters below stay accurate
+            await self._slots.acquire()
+        else:
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise InferenceOverloaded(f"{self._waiting} requests already waiting for an inference slot")
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise InferenceOverloaded(f"No inference slot freed up within {self.queue_timeout}s")
+            finally:
+                self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, compute_seconds = await loop.run_in_executor(self._executor, self._timed, fn, args)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+        # Anything that was not spent computing was spent waiting for a slot or a thread
+        queue_seconds = max(0.0, time.perf_counter() - enqueued - compute_seconds)
+        with self._lock:
+            self.completed += 1
+            self.total_queue_seconds += queue_seconds
+            self.total_compute_seconds += compute_seconds
+            self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+            self.max_compute_seconds = max(self.max_compute_seconds, compute_seconds)
+        return result, {
+            "queue_ms": round(queue_seconds * 1000, 3),
+            "compute_ms": round(compute_seconds * 1000, 3)
+        }
+
+    def stats(self):
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "completed": completed,
+                "rejected": self.rejected,
+                "avg_queue_ms": round(self.total_queue_seconds / completed * 1000, 3) if completed else 0.0,
+                "avg_compute_ms": round(self.total_compute_seconds / completed * 1000, 3) if completed else 0.0,
+                "max_queue_ms": round(self.max_queue_seconds * 1000, 3),
+                "max_compute_ms": round(self.max_compute_seconds * 1000, 3)
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
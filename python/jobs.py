@@ -0,0 +1,145 @@
+"""
+Background job runner for CPU-heavy model training
+Keeps training off the event loop and never runs two jobs for the same model at once:
+jobs of one kind run in submission order, and a request identical to one still waiting
+to start shares that job
+"""
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+def _describe(value):
+    if callable(value):
+        return getattr(value, "__qualname__", repr(value))
+    return value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+
+class Job:
+    def __init__(self, kind:str, description:str="", key=None, params:Optional[dict]=None, after:Optional["Job"]=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.description = description
+        # What the job runs with: identical submissions share a pending job, others queue behind it
+        self.key = key
+        self.params = params or {}
+        self.after = after
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = f"Waiting for job {after.id}" if after is not None else "Waiting for a free worker"
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    def report(self, done:int, total:int, message:Optional[str]=None):
+        self.progress = round(done / total, 4) if total else 1.0
+        self.message = message or f"{done}/{total} done"
+
+    def to_dict(self):
+        now = time.time()
+        started = self.started_at or now
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "params": self.params,
+            "queued_behind": self.after.id if self.after is not None and not self.after.done else None,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": round(started - self.created_at, 3),
+            "run_seconds": round((self.finished_at or now) - self.started_at, 3) if self.started_at else None
+        }
+
+class JobManager:
+    def __init__(self, max_workers:int=1, history:int=200):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aizy-job")
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._history = history
+        self._lock = threading.Lock()
+
+    def submit(self, kind:str, fn, *args, description:str="", with_progress:bool=False, **kwargs):
+        """
+        Queue fn for the model `kind` behind its unfinished jobs; returns (job, created).
+        A queued job with the same fn and arguments is returned instead of a new one; a running
+        one is not, as it may have read its inputs before the caller's changes
+        """
+        key = (fn, args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            for queued in self._queued(kind):
+                if queued.key == key:
+                    return queued, False
+            active = self._active.get(kind)
+            params = {"fn": _describe(fn), "args": [_describe(arg) for arg in args],
+                      **{name: _describe(value) for name, value in kwargs.items()}}
+            job = Job(kind, description, key, params, after=active if active is not None and not active.done else None)
+            if with_progress:
+                kwargs["progress_callback"] = job.report
+            self._jobs[job.id] = job
+            self._active[kind] = job
+            while len(self._jobs) > self._history:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if not oldest.done:
+                    break
+                del self._jobs[oldest_id]
+            job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+            return job, True
+
+    def _queued(self, kind:str):
+        return [job for job in self._jobs.values() if job.kind == kind and job.status == QUEUED]
+
+    def _run(self, job:Job, fn, args, kwargs):
+        if job.after is not None:
+            # Jobs are picked up in submission order, so the one ahead is already running
+            job.after.future.exception()
+            job.after = None
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.message = "Running"
+        try:
+            result = fn(*args, **kwargs)
+            if result is False:
+                job.status = FAILED
+                job.error = "Training failed, check the server logs for details"
+            else:
+                job.status = SUCCEEDED
+                job.progress = 1.0
+            job.message = "Finished"
+            return result
+        except Exception as e:
+            traceback.print_exc()
+            job.status = FAILED
+            job.error = str(e)
+            job.message = "Finished with an error"
+            return False
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id:str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, limit:int=50):
+        with self._lock:
+            jobs = list(self._jobs.values())[-limit:]
+        return [job.to_dict() for job in reversed(jobs)]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,27 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from ai import EcommerceAI
+from startup import startup_timer
+with startup_timer.stage("import:fastapi"):
+    from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.concurrency import run_in_threadpool
+    from pydantic import BaseModel, Field
+with startup_timer.stage("import:ai"):
+    from ai import EcommerceAI
+    from model import FASHION_MODEL_NAME, MAX_FORECAST_MONTHS, SALES_MODEL_NAME
+    from service import get_ai, inference_pool, model_service, run_inference
+    from auth import ADMIN_TOKEN, require_admin
+with startup_timer.stage("import:jobs"):
+    from jobs import JobManager
+    from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REQUEST_SECONDS, metrics, stage
+    from cache import LRUCache
+    from profiling import ProfileStore, RequestProfiling
+    from cluster import FileLock, Poller
 import os
-from typing import Optional
+import time
+import gzip
+import json
+import math
+import hashlib
+from typing import List, Optional
 import asyncio
 
 app = FastAPI(title="Ecommerce AI API", version="1.0.0")
@@ -22,182 +39,597 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-ai_instance = None
+models_warm = False
+#? AIZY_PRELOAD_MODELS=0 skips the startup warm-up: each model is then loaded by its first request
+PRELOAD_MODELS = os.getenv("AIZY_PRELOAD_MODELS", "1") != "0"
+job_manager = JobManager(max_workers=int(os.getenv("AIZY_MAX_TRAINING_JOBS", "1")))
+#? start_server.py --workers N sets AIZY_WORKERS; the worker holding the leader lock trains, the others follow
+WORKERS = int(os.getenv("AIZY_WORKERS", "1"))
+leader_lock = FileLock(os.path.join("models", ".leader.lock"))
+model_poller = None
+
+request_profiling = RequestProfiling(
+    ProfileStore(os.getenv("AIZY_PROFILE_DIR", "profiles"), keep=int(os.getenv("AIZY_PROFILE_KEEP", "50"))),
+    sample_rate=float(os.getenv("AIZY_PROFILE_SAMPLE_RATE", "0")),
+    interval=float(os.getenv("AIZY_PROFILE_INTERVAL_MS", "5")) / 1000,
+    max_seconds=float(os.getenv("AIZY_PROFILE_MAX_SECONDS", "60")),
+    token=ADMIN_TOKEN
+)
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Opt-in profiling: X-Aizy-Profile: 1, ?profile=1 or AIZY_PROFILE_SAMPLE_RATE, only with AIZY_ADMIN_TOKEN set"""
+    if request.url.path.startswith("/ai/admin/profiles") or request.url.path == "/metrics":
+        return await call_next(request)
+    trigger = request_profiling.trigger(request.headers, request.query_params)
+    profiler = request_profiling.begin() if trigger else None
+    if profiler is None:
+        return await call_next(request)
+    started_at = time.time()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        route = request.scope.get("route")
+        profile_id = await run_in_threadpool(
+            request_profiling.finish, profiler, started_at, time.perf_counter() - started, trigger=trigger, method=request.method,
+            path=request.url.path, route=getattr(route, "path", "unmatched"), status=status)
+    response.headers["X-Aizy-Profile-Id"] = profile_id
+    return response
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, so /ai/jobs/{job_id} stays a single series
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                                route=getattr(route, "path", "unmatched"), status=status)
+
+def _collect_runtime_metrics():
+    gauge = metrics.gauge
+    inference = inference_pool.stats()
+    pool = gauge("aizy_inference_pool", "Inference pool state", ("field",))
+    for field in ("in_flight", "waiting", "completed", "rejected"):
+        pool.set(inference[field], field=field)
+    jobs = gauge("aizy_training_jobs", "Training jobs currently tracked, by status", ("status",))
+    counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+    for job in job_manager.list(limit=1000):
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+    for status, count in counts.items():
+        jobs.set(count, status=status)
+    gauge("aizy_models_warm", "1 once startup warm-up finished").set(1 if models_warm else 0)
+    if not model_service.loaded:
+        return
+    ai_instance = model_service.ai
+
+    loaded = gauge("aizy_model_loaded", "1 when the model is in memory", ("model",))
+    memory = gauge("aizy_model_memory_bytes", "Approximate memory held by the loaded model", ("model", "kind"))
+    load_seconds = gauge("aizy_model_load_seconds", "Duration of the load or training run behind the loaded model", ("model",))
+    evictions = gauge("aizy_model_evictions", "Models dropped to stay under the memory budget", ("model",))
+    for name, stats in model_service.stats()["models"].items():
+        loaded.set(1 if stats["loaded"] else 0, model=name)
+        footprint = stats["footprint"] or {"bytes": 0, "mapped_bytes": 0}
+        memory.set(footprint["bytes"], model=name, kind="private")
+        memory.set(footprint["mapped_bytes"], model=name, kind="mapped")
+        load_seconds.set(stats["load_seconds"] or 0, model=name)
+        evictions.set(stats["evictions"], model=name)
+    sizes = gauge("aizy_model_artifact_bytes", "Size on disk of the artifact currently in use", ("model",))
+    versions = gauge("aizy_model_version", "Registry version of the artifact currently in use", ("model",))
+    registry = ai_instance.models.registry
+    for name, metadata in ai_instance.models.artifacts.items():
+        path = os.path.join(registry.root, name, metadata["file"])
+        if os.path.exists(path):
+            sizes.set(os.path.getsize(path), model=name)
+        versions.set(metadata["version"], model=name)
+    if ai_instance.sales_model is not None:
+        sales_model = ai_instance.sales_model
+        gauge("aizy_sales_products", "Products in the live sales pivots").set(sales_model["sales_data"].shape[1])
+        gauge("aizy_sales_months", "Months of history in the live sales pivots").set(sales_model["sales_data"].shape[0])
+        gauge("aizy_sales_pending_products", "Products waiting for a refit after ingestion").set(
+            len(sales_model.get("pending_products") or []))
+
+    caches = {"fashion_predictions": ai_instance.fashion_cache.stats(), "plots": ai_instance.plot_cache.stats()}
+    for field in ("size", "hits", "misses", "evictions"):
+        cache_gauge = gauge(f"aizy_cache_{field}", f"Cache {field} per cache", ("cache",))
+        for name, stats in caches.items():
+            cache_gauge.set(stats[field], cache=name)
+        if field in ("hits", "misses"):
+            cache_gauge.set(ai_instance.models.data_cache.stats()[field], cache="parsed_data")
+    gauge("aizy_cache_size", "Cache size per cache", ("cache",)).set(len(ai_instance.models.fit_cache or {}), cache="forecast_fits")
+
+metrics.add_collector(_collect_runtime_metrics)
 
 class FashionQuery(BaseModel):
     prompt: str
+    k: Optional[int] = None
+
+class FashionBatchQuery(BaseModel):
+    prompts: List[str]
 
 class TrainingRequest(BaseModel):
     filepath: Optional[str] = None
     months_to_forecast: Optional[int] = 3
+    n_jobs: Optional[int] = None
+    engine: Optional[str] = None
+    incremental: Optional[bool] = True
+
+class SalesOrder(BaseModel):
+    date: str
+    product_name: str
+    sales: float
+    profit: Optional[float] = None
+
+class SalesOrderBatch(BaseModel):
+    orders: List[SalesOrder]
+
+class AccountScoringRequest(BaseModel):
+    accounts: List[dict]
+    top: Optional[int] = Field(None, ge=1)
+    threshold: float = 0.5
+    reasons: int = 3
 
 class AIResponse(BaseModel):
     success: bool
     message: str
     data: Optional[dict] = None
 
+def _preload_models(ai_instance: EcommerceAI):
+    try:
+        with startup_timer.stage("init:fashion"):
+            job, _ = job_manager.submit("fashion", model_service.ensure, FASHION_MODEL_NAME, description="Startup load")
+            job.future.result()
+        print("✅ Fashion assistant initialized")
+    except Exception as e:
+        print(f"⚠️ Fashion assistant initialization failed: {e}")
+    
+    try:
+        if os.path.exists("./data/products.csv"):
+            with startup_timer.stage("init:sales"):
+                job, _ = job_manager.submit("sales", model_service.ensure, SALES_MODEL_NAME,
+                                            description="Startup load", with_progress=True)
+                job.future.result()
+            print("✅ Sales forecaster initialized")
+        else:
+            print("ℹ️ No products.csv found, sales forecaster will be trained on first request")
+    except Exception as e:
+        print(f"⚠️ Sales forecaster initialization failed: {e}")
+
 def initialize_ai_models():
-    global ai_instance
+    global models_warm
     try:
         os.makedirs("data", exist_ok=True)
         os.makedirs("plots", exist_ok=True)
         os.makedirs("models", exist_ok=True)
         
         print("🚀 Initializing AI models...")
+        ai_instance = model_service.ai
         
-        ai_instance = EcommerceAI()
-        
-        try:
-            ai_instance.train_fashion_assistant("./data/fashion.csv")
-            print("✅ Fashion assistant initialized")
-        except Exception as e:
-            print(f"⚠️ Fashion assistant initialization failed: {e}")
-        
-        try:
-            if os.path.exists("./data/products.csv"):
-                ai_instance.train_sales_forecaster("./data/products.csv")
-                print("✅ Sales forecaster initialized")
-            else:
-                print("ℹ️ No products.csv found, sales forecaster will be trained on first request")
-        except Exception as e:
-            print(f"⚠️ Sales forecaster initialization failed: {e}")
+        if PRELOAD_MODELS:
+            _preload_models(ai_instance)
+        else:
+            print("💤 Model preloading disabled, each model loads on first use")
+
+        if ai_instance.shared_store:
+            _start_model_poller()
             
+        models_warm = True
         print("✅ AI models initialized successfully")
         return True
     except Exception as e:
         print(f"❌ Error during AI initialization: {e}")
         return False
 
+def _worker_role():
+    ai_instance = model_service.ai
+    if not ai_instance.shared_store:
+        return "single"
+    return "follower" if ai_instance.follower else "leader"
+
+def _require_leader(ai_instance: EcommerceAI):
+    """Training is the elected leader's job; followers turn it away so only one worker writes the registry"""
+    if ai_instance.follower:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Worker {os.getpid()} is a follower and does not train, retry to reach the leader worker",
+            headers={"Retry-After": "1", "X-Worker-Role": "follower"}
+        )
+
+def _sync_shared_models():
+    """Poller tick: take over if the leader exited, then adopt what the other workers published"""
+    ai_instance = model_service.ai
+    if ai_instance.follower and leader_lock.acquire(blocking=False):
+        ai_instance.follower = False
+        print(f"👑 Worker {os.getpid()} took over as leader")
+    ai_instance.sync_shared_models()
+    if not ai_instance.follower and ai_instance.sales_model is not None and ai_instance.sales_model.get("pending_products"):
+        job_manager.submit("sales-refresh", ai_instance.refresh_sales_forecasts,
+                           description="Refit products with orders from other workers", with_progress=True)
+
+def _start_model_poller():
+    global model_poller
+    if model_poller is None:
+        model_poller = Poller(_sync_shared_models, interval=float(os.getenv("AIZY_MODEL_POLL_SECONDS", "5")),
+                              name="aizy-model-poller")
+        model_poller.start()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize AI models when the API starts"""
     try:
+        with startup_timer.stage("init:ai_instance"):
+            ai_instance = model_service.ai
+            if WORKERS > 1:
+                # Only the leader trains; the others load what it publishes, memory-mapped
+                ai_instance.shared_store = True
+                ai_instance.follower = not leader_lock.acquire(blocking=False)
+                print(f"👥 Worker {os.getpid()} is the {_worker_role()} of {WORKERS}")
+
         loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, initialize_ai_models)
-        
-        if os.path.exists("plots") and not hasattr(app, '_plots_mounted'):
-            app.mount("/plots", StaticFiles(directory="plots"), name="plots")
-            app._plots_mounted = True
-            print("📁 Static plots directory mounted at /plots")
+        warmup = loop.run_in_executor(None, initialize_ai_models)
+        if os.getenv("AIZY_FAST_START", "1") == "1":
+            # Bind the port now and let the models warm up in the background
+            app.state.warmup = warmup
+            print("⚡ Fast start: models are warming up in the background")
+        else:
+            await warmup
     except Exception as e:
         print(f"⚠️ Startup error: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if model_poller is not None:
+        model_poller.stop()
+    leader_lock.release()
+    job_manager.shutdown()
+    inference_pool.shutdown()
+
 @app.get("/")
 def read_root():
     return {"message": "Ecommerce AI API is running", "status": "active"}
 
 @app.get("/health")
 def health_check():
-    global ai_instance
+    ai_instance = model_service.ai if model_service.loaded else None
     return {
         "status": "healthy", 
         "ai_ready": ai_instance is not None,
-        "plots_available": os.path.exists("plots")
+        "models_warm": models_warm,
+        "plots_available": ai_instance is not None and ai_instance.sales_model is not None,
+        "fashion_cache": ai_instance.fashion_cache.stats() if ai_instance is not None else None,
+        "data_cache": ai_instance.models.data_cache.stats() if ai_instance is not None else None,
+        "inference": inference_pool.stats(),
+        "models": model_service.stats(),
+        "worker": {"pid": os.getpid(), "role": _worker_role() if ai_instance is not None else None, "workers": WORKERS},
+        "model_versions": {
+            name: metadata["version"] for name, metadata in ai_instance.models.artifacts.items()
+        } if ai_instance is not None else {}
     }
 
+def _fashion_answer(ai_instance: EcommerceAI, prompt: str, k: Optional[int]):
+    if not k:
+        return {"recommendation": ai_instance.fashion_assistant(prompt)}
+    recommendation, suggestions = ai_instance.fashion_assistant_with_suggestions(prompt, k)
+    return {"recommendation": recommendation, "suggestions": suggestions}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of request latency, pipeline stages, models and caches"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/ai/admin/profiles", dependencies=[Depends(require_admin)])
+def list_profiles(limit: int = Query(50, ge=1, le=1000)):
+    """Captured request profiles, newest first"""
+    return {
+        "profiles": request_profiling.store.list()[:limit],
+        "captured": request_profiling.captured,
+        "skipped_busy": request_profiling.skipped_busy,
+        "sample_rate": request_profiling.sample_rate
+    }
+
+@app.get("/ai/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def download_profile(profile_id: str):
+    """Folded stacks of one profile, ready for flamegraph.pl or speedscope"""
+    folded = request_profiling.store.load(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return Response(content=folded, media_type="text/plain; charset=utf-8",
+                    headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'})
+
+@app.get("/startup")
+def startup_report():
+    """Import and initialization time broken down per module and stage"""
+    return {"models_warm": models_warm, **startup_timer.report()}
+
 @app.post("/ai/fashion/query", response_model=AIResponse)
-async def fashion_query(query: FashionQuery):
+async def fashion_query(query: FashionQuery, response: Response, ai_instance: EcommerceAI = Depends(get_ai)):
     """Get fashion recommendations from AI"""
-    global ai_instance
     try:
-        if ai_instance is None:
-            ai_instance = EcommerceAI()
-            
-        result = ai_instance.fashion_assistant(query.prompt)
+        data, timing = await run_inference(response, _fashion_answer, ai_instance, query.prompt, query.k)
+        data["timing"] = timing
         return AIResponse(
             success=True,
             message="Fashion recommendation generated",
-            data={"recommendation": result}
+            data=data
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting fashion advice: {str(e)}")
 
-@app.post("/ai/fashion/train", response_model=AIResponse)
-async def train_fashion_model(request: TrainingRequest):
-    """Train or retrain the fashion assistant model"""
-    global ai_instance
+@app.post("/ai/fashion/query/batch", response_model=AIResponse)
+async def fashion_query_batch(query: FashionBatchQuery, response: Response, ai_instance: EcommerceAI = Depends(get_ai)):
+    """Get fashion recommendations for many prompts in one model call"""
     try:
-        if ai_instance is None:
-            ai_instance = EcommerceAI()
-            
-        filepath = request.filepath or "./data/fashion.csv"
-        ai_instance.train_fashion_assistant(filepath)
+        results, timing = await run_inference(response, ai_instance.fashion_assistant_batch, query.prompts)
         return AIResponse(
             success=True,
-            message="Fashion assistant model trained successfully"
+            message=f"{len(results)} fashion recommendations generated",
+            data={"recommendations": results, "timing": timing}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting fashion advice: {str(e)}")
+
+def _job_response(job, created:bool, label:str):
+    return AIResponse(
+        success=True,
+        message=(f"{label} training job queued" if created else
+                 f"{label} training with the same parameters is already queued"),
+        data={"job": job.to_dict()}
+    )
+
+@app.post("/ai/fashion/train", response_model=AIResponse, status_code=202)
+async def train_fashion_model(request: TrainingRequest, ai_instance: EcommerceAI = Depends(get_ai)):
+    """Queue a (re)training run of the fashion assistant model"""
+    _require_leader(ai_instance)
+    try:
+        filepath = request.filepath or "./data/fashion.csv"
+        job, created = job_manager.submit(
+            "fashion", ai_instance.train_fashion_assistant, filepath,
+            engine=request.engine, description=f"Fashion assistant from {filepath}"
         )
+        return _job_response(job, created, "Fashion assistant")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error training fashion model: {str(e)}")
 
-@app.post("/ai/sales/forecast", response_model=AIResponse)
-async def get_sales_forecast():
-    """Get sales forecasting results"""
-    global ai_instance
+@app.post("/ai/sales/orders", response_model=AIResponse, status_code=202)
+async def ingest_sales_orders(request: SalesOrderBatch, ai_instance: EcommerceAI = Depends(get_ai)):
+    """Append new orders to the live monthly pivots and refit only the products they touch"""
     try:
-        print("📊 Starting sales forecast generation...")
-        
-        if ai_instance is None:
-            print("🔄 AI instance not found, initializing...")
-            ai_instance = EcommerceAI()
-            
-        result = ai_instance.sales_forecaster()
-        print("✅ Sales forecast completed successfully")
-        
+        if not request.orders:
+            raise HTTPException(status_code=400, detail="No orders provided")
+        if ai_instance.sales_model is None:
+            job, _ = job_manager.submit("sales", model_service.ensure, SALES_MODEL_NAME,
+                                        description="Loading before order ingestion", with_progress=True)
+            await asyncio.wrap_future(job.future)
 
-        if result:
-            plot_base_url = "http://127.0.0.1:8000/plots"
-            best_product = result.get('best_overall_product', 'product')
-            safe_product_name = best_product.replace(' ', '_').replace('/', '_').replace('\\', '_')
-            
-            result["plot_urls"] = {
-                "comprehensive_analysis": f"{plot_base_url}/comprehensive_seller_analysis.png",
-                "detailed_analysis": f"{plot_base_url}/{safe_product_name}_detailed_analysis.png"
-            }
-            print(f"📈 Added plot URLs to response")
-        
+        orders = [
+            {"date": order.date, "product_name": order.product_name, "sales": order.sales, "profit": order.profit}
+            for order in request.orders
+        ]
+        summary = await run_in_threadpool(ai_instance.ingest_sales_orders, orders)
+        if summary["accepted"] == 0:
+            raise HTTPException(status_code=422, detail={
+                "message": f"None of the {len(orders)} orders had a valid date, product name and sales amount",
+                "rejected": summary["rejected"]
+            })
+        job = None
+        if summary["pending_products"]:
+            job, _ = job_manager.submit("sales-refresh", ai_instance.refresh_sales_forecasts,
+                                        description="Refit products with new orders", with_progress=True)
         return AIResponse(
             success=True,
-            message="Sales forecast generated successfully",
-            data={"forecast": result}
+            message=f"Accepted {summary['accepted']} of {len(orders)} orders",
+            data={"ingest": summary, "job": job.to_dict() if job else None}
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error ingesting sales orders: {e}")
+        raise HTTPException(status_code=500, detail=f"Order ingestion failed: {str(e)}")
+
+#? Serialized forecast responses per model version: built once, then every poll just sends bytes
+# Keyed by (model version, horizon); None is the horizon the model was trained for
+forecast_payloads = LRUCache(maxsize=16)
+FORECAST_GZIP = os.getenv("AIZY_FORECAST_GZIP", "1") == "1"
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if hasattr(value, "tolist"):
+        # numpy scalars and arrays
+        return _jsonable(value.tolist())
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check: a comma separated list or *, compared weakly (W/"x" matches "x") as RFC 9110 asks for"""
+    if_none_match = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    return etag.removeprefix("W/") in if_none_match or "*" in if_none_match
+
+def _forecast_payload(ai_instance: EcommerceAI, months: Optional[int] = None):
+    version, result = ai_instance.sales_forecast_snapshot(months)
+    payload = forecast_payloads.get((version, months))
+    if payload is not None:
+        return payload
+    with stage("main", "serialize_forecast"):
+        plot_base_url = "http://127.0.0.1:8000/plots"
+        best_product = result.get('best_overall_product', 'product')
+        safe_product_name = best_product.replace(' ', '_').replace('/', '_').replace('\\', '_')
+        result["plot_urls"] = {
+            "comprehensive_analysis": f"{plot_base_url}/comprehensive_seller_analysis.png",
+            "detailed_analysis": f"{plot_base_url}/{safe_product_name}_detailed_analysis.png"
+        }
+        body = json.dumps(_jsonable({
+            "success": True,
+            "message": "Sales forecast generated successfully",
+            "data": {"forecast": result}
+        }), separators=(",", ":")).encode()
+        # A retrain that reproduces the same numbers is still a new version, so the tag covers both
+        etag = '"' + hashlib.sha1(f"{version}|".encode() + body).hexdigest()[:20] + '"'
+        payload = {
+            "version": version,
+            "body": body,
+            "gzip": gzip.compress(body, 6) if FORECAST_GZIP and len(body) > 1024 else None,
+            "etag": etag
+        }
+    forecast_payloads.set((version, months), payload)
+    print(f"📦 Serialized forecast v{version} ({result['months_forecasted']} months): {len(body)} bytes" +
+          (f", {len(payload['gzip'])} gzipped" if payload["gzip"] else ""))
+    return payload
+
+@app.get("/ai/sales/forecast", response_model=AIResponse)
+@app.post("/ai/sales/forecast", response_model=AIResponse)
+async def get_sales_forecast(request: Request, months: Optional[int] = Query(None, ge=1, le=MAX_FORECAST_MONTHS),
+                             ai_instance: EcommerceAI = Depends(get_ai)):
+    """Get sales forecasting results over `months` (default: the trained horizon), cached per version with an ETag"""
+    try:
+        if ai_instance.sales_model is None:
+            # Share a single training run with any retrain already in flight
+            job, _ = job_manager.submit("sales", model_service.ensure, SALES_MODEL_NAME,
+                                        description="Loading for first forecast", with_progress=True)
+            await asyncio.wrap_future(job.future)
+
+        payload = forecast_payloads.get((ai_instance.sales_model_version, months))
+        if payload is None:
+            payload = await run_in_threadpool(_forecast_payload, ai_instance, months)
+
+        use_gzip = payload["gzip"] is not None and "gzip" in request.headers.get("accept-encoding", "").lower()
+        # Each encoding is its own representation, so it gets its own ETag
+        etag = payload["etag"][:-1] + '-gz"' if use_gzip else payload["etag"]
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding",
+                   "X-Model-Version": payload["version"]}
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+        return Response(content=payload["gzip"] if use_gzip else payload["body"],
+                        media_type="application/json", headers=headers)
     except Exception as e:
         print(f"❌ Error in get_sales_forecast: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error getting sales forecast: {str(e)}")
 
-@app.post("/ai/sales/train", response_model=AIResponse)
-async def train_sales_model(request: TrainingRequest):
-    """Train or retrain the sales forecasting model"""
-    global ai_instance
+@app.get("/ai/sales/series")
+async def get_sales_series(
+    products: Optional[List[str]] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    max_points: Optional[int] = Query(None, ge=2),
+    ai_instance: EcommerceAI = Depends(get_ai)
+):
+    """Historical and forecast monthly series as columnar arrays for client-side charts"""
+    try:
+        series = await run_in_threadpool(ai_instance.sales_series, products, offset, limit, max_points)
+        return AIResponse(success=True, message=f"{len(series['products'])} product series", data=series)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting sales series: {str(e)}")
+
+PLOT_MEDIA_TYPES = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+
+def _plot_etag(version: str, plot_name: str, fmt: str, dpi: int):
+    return '"' + hashlib.sha1(f"{version}|{plot_name}|{fmt}|{dpi}".encode()).hexdigest()[:20] + '"'
+
+@app.get("/plots/{filename}")
+async def get_plot(filename: str, request: Request, dpi: int = int(os.getenv("AIZY_PLOT_DPI", "100")),
+                   ai_instance: EcommerceAI = Depends(get_ai)):
+    """Render a forecast plot on first request and serve it from cache with an ETag"""
+    plot_name, _, fmt = filename.rpartition(".")
+    fmt = fmt.lower()
+    if not plot_name or fmt not in PLOT_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unknown plot '{filename}', use one of: {', '.join(PLOT_MEDIA_TYPES)}")
+    dpi = max(30, min(dpi, 300))
+
+    # The ETag only depends on the model version and render options, so a revalidation never renders
+    version = ai_instance.sales_model_version
+    if version is not None:
+        etag = _plot_etag(version, plot_name, fmt, dpi)
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    rendered = await run_in_threadpool(ai_instance.render_forecast_plot, plot_name, fmt, dpi)
+    if rendered is None:
+        raise HTTPException(status_code=404, detail=f"Plot '{filename}' is not available")
+    image, version = rendered
+    return Response(
+        content=image,
+        media_type=PLOT_MEDIA_TYPES[fmt],
+        headers={"ETag": _plot_etag(version, plot_name, fmt, dpi), "Cache-Control": "no-cache"}
+    )
+
+@app.post("/ai/sales/train", response_model=AIResponse, status_code=202)
+async def train_sales_model(request: TrainingRequest, ai_instance: EcommerceAI = Depends(get_ai)):
+    """Queue a (re)training run of the sales forecasting model"""
+    _require_leader(ai_instance)
     try:
-        if ai_instance is None:
-            ai_instance = EcommerceAI()
-            
         filepath = request.filepath or "./data/products.csv"
         months = request.months_to_forecast or 3
         
-        success = ai_instance.train_sales_forecaster(filepath, months)
-        if success:
-            return AIResponse(
-                success=True,
-                message="Sales forecasting model trained successfully"
-            )
-        else:
-            raise HTTPException(status_code=400, detail="Failed to train sales model")
+        job, created = job_manager.submit(
+            "sales", ai_instance.train_sales_forecaster, filepath, months,
+            n_jobs=request.n_jobs, engine=request.engine, incremental=request.incremental is not False,
+            description=f"Sales forecaster from {filepath} ({months} months)", with_progress=True
+        )
+        return _job_response(job, created, "Sales forecaster")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error training sales model: {str(e)}")
 
-@app.post("/ai/admin/train", response_model=AIResponse)
-async def train_admin_model(request: TrainingRequest):
-    """Train admin AI model (fake account detection)"""
-    global ai_instance
+@app.get("/ai/jobs")
+def list_jobs(limit: int = Query(50, ge=1, le=1000)):
+    """List recent training jobs, newest first"""
+    return {"jobs": job_manager.list(limit)}
+
+@app.get("/ai/jobs/{job_id}")
+def get_job(job_id: str):
+    """Get status, progress and timings of a training job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+@app.post("/ai/admin/train", response_model=AIResponse, status_code=202, dependencies=[Depends(require_admin)])
+async def train_admin_model(request: TrainingRequest, ai_instance: EcommerceAI = Depends(get_ai)):
+    """Queue a (re)training run of the admin AI model (fake account detection)"""
+    _require_leader(ai_instance)
     try:
-        if ai_instance is None:
-            ai_instance = EcommerceAI()
-            
         filepath = request.filepath or "./data/fake_accounts.csv"
-        ai_instance.train_admin_ai(filepath)
-        return AIResponse(success=True, message="Admin AI model training initiated")
+        job, created = job_manager.submit(
+            "admin", ai_instance.train_admin_ai, filepath, description=f"Fake account detector from {filepath}"
+        )
+        return _job_response(job, created, "Fake account detector")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error training admin model: {str(e)}")
+
+MAX_SCORE_BATCH = int(os.getenv("AIZY_MAX_SCORE_BATCH", "50000"))
+
+@app.post("/ai/admin/accounts/score", response_model=AIResponse, dependencies=[Depends(require_admin)])
+async def score_accounts(body: AccountScoringRequest, ai_instance: EcommerceAI = Depends(get_ai)):
+    """Fake account risk for a batch of accounts in one vectorized pass, riskiest first"""
+    if not body.accounts:
+        raise HTTPException(status_code=400, detail="No accounts provided")
+    if len(body.accounts) > MAX_SCORE_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_SCORE_BATCH} accounts per request, split the sweep into batches")
+    try:
+        # A cold model loads (or trains) once; concurrent sweeps wait on the same warm-up
+        scored = await run_in_threadpool(ai_instance.score_accounts, body.accounts, body.top,
+                                         body.threshold, max(0, body.reasons))
+        return AIResponse(
+            success=True,
+            message=f"{scored['flagged']} of {scored['scored']} accounts flagged as likely fake",
+            data=scored
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error training admin model: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error scoring accounts: {str(e)}")
@@ -0,0 +1,188 @@
+"""
+Prometheus metrics for the API and the AI pipeline
+Hand-rolled text exposition (format 0.0.4) so the service needs no extra dependency:
+histograms for request latency and pipeline stages, counters, and gauges that are
+collected from callbacks when /metrics is scraped
+"""
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+FIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name:str, help:str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels:dict):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount:float=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def render(self):
+        with self._lock:
+            series = dict(self._series)
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(series.items())
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value:float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name:str, help:str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value:float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        with self._lock:
+            series = {key: (list(s["counts"]), s["sum"], s["count"]) for key, s in self._series.items()}
+        lines = self.header()
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name:str, help:str, labelnames=()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name:str, help:str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name:str, help:str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """collector() is called on every scrape and sets gauges from live objects"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram(
+    "aizy_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"))
+STAGE_SECONDS = metrics.histogram(
+    "aizy_stage_duration_seconds", "Time spent in each named stage of the AI pipeline",
+    ("component", "stage"))
+STAGE_FAILURES = metrics.counter(
+    "aizy_stage_failures_total", "Stages that ended with an exception",
+    ("component", "stage"))
+FIT_SECONDS = metrics.histogram(
+    "aizy_forecast_fit_seconds", "Per-product forecast fit time",
+    ("engine",), buckets=FIT_BUCKETS)
+FIT_FAILURES = metrics.counter(
+    "aizy_forecast_fit_failures_total", "Products whose forecast fit failed",
+    ("engine",))
+
+@contextmanager
+def stage(component:str, name:str):
+    """Time a block as aizy_stage_duration_seconds{component, stage}"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_FAILURES.inc(component=component, stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, component=component, stage=name)
+
+def timed(component:str, name:str=None, falsy_is_failure:bool=False):
+    """
+    Decorator form of stage(); the stage defaults to the function name.
+    falsy_is_failure also counts None/False returns as failures, for the methods that
+    report errors by printing and returning instead of raising
+    """
+    def decorate(fn):
+        stage_name = name or fn.__name__
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(component, stage_name):
+                result = fn(*args, **kwargs)
+            if falsy_is_failure and (result is None or result is False):
+                STAGE_FAILURES.inc(component=component, stage=stage_name)
+            return result
+        return wrapper
+    return decorate
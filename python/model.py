@@ -1,46 +1,590 @@
-import pandas as pd
-import joblib
-import numpy as np
-import matplotlib
-matplotlib.use('Agg')  # Use non-GUI backend to avoid threading issues
-import matplotlib.pyplot as plt
-from sklearn.ensemble import RandomForestClassifier
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.pipeline import Pipeline
+import io
 import os
+import math
+import time
+import hashlib
 import warnings
-from typing import cast
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, cast
+from registry import ModelRegistry
+from data_cache import ParsedDataCache, frame_from_arrays, frame_to_arrays
+from metrics import FIT_FAILURES, FIT_SECONDS, stage, timed
+from startup import lazy_callable, lazy_module
+
+#? Heavy dependencies load on first use so importing this module stays cheap
+pd = lazy_module("pandas")
+np = lazy_module("numpy")
+joblib = lazy_module("joblib")
+Figure = lazy_callable("matplotlib.figure", "Figure")
+FigureCanvasAgg = lazy_callable("matplotlib.backends.backend_agg", "FigureCanvasAgg")
+sparse = lazy_module("scipy.sparse")
+RandomForestClassifier = lazy_callable("sklearn.ensemble", "RandomForestClassifier")
+# statsmodels re-enables its ConvergenceWarnings on import, so silence them again afterwards
+ARIMA = lazy_callable("statsmodels.tsa.arima.model", "ARIMA", after_import=lambda: warnings.filterwarnings("ignore"))
+TfidfVectorizer = lazy_callable("sklearn.feature_extraction.text", "TfidfVectorizer")
+Pipeline = lazy_callable("sklearn.pipeline", "Pipeline")
+normalize = lazy_callable("sklearn.preprocessing", "normalize")
+StandardScaler = lazy_callable("sklearn.preprocessing", "StandardScaler")
+LogisticRegression = lazy_callable("sklearn.linear_model", "LogisticRegression")
+train_test_split = lazy_callable("sklearn.model_selection", "train_test_split")
+roc_auc_score = lazy_callable("sklearn.metrics", "roc_auc_score")
 
 warnings.filterwarnings("ignore")
+
+def _available_cpus() -> int:
+    # The CPUs this process may run on, which in a container is often fewer than the host has
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:  # macOS, Windows
+        return os.cpu_count() or 1
+
+def _resolve_n_jobs(n_jobs:Optional[int], n_tasks:int) -> int:
+    # Same convention as joblib/sklearn: -1 (or 0/None) means "all cores"; never more than we may use
+    cpus = _available_cpus()
+    if n_jobs is None or n_jobs <= 0:
+        n_jobs = cpus
+    return max(1, min(n_jobs, cpus, n_tasks))
+
+def _process_pool_context():
+    # Forking a threaded server copies locks held by other threads; start workers from a clean process
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+#? A fitted series is kept as a (level, step, decay) state: the forecast for month h ahead is
+#? level + step * (1 + decay + ... + decay^(h-1)). That is exact for ARIMA(1,1,1) (the MA
+#? term only shapes the first step) and for every vectorized engine, so any horizon can be
+#? produced from three numbers per series without refitting.
+MAX_FORECAST_MONTHS = 36
+FORECAST_STATE_COLUMNS = ['sales_level', 'sales_step', 'sales_decay', 'profit_level', 'profit_step', 'profit_decay']
+
+def forecast_paths(states, months:int):
+    """(series, 3) states -> (series, months) matrix of monthly forecasts"""
+    states = np.asarray(states, dtype=float).reshape(-1, 3)
+    growth = (states[:, 2:3] ** np.arange(months)).cumsum(axis=1)
+    return states[:, 0:1] + states[:, 1:2] * growth
+
+def _arima_state(series):
+    # Fit on the raw values: the monthly index has gaps, so it carries no usable frequency
+    values = series.to_numpy(dtype=float)
+    fitted = ARIMA(values, order=(1, 1, 1), enforce_stationarity=False, enforce_invertibility=False).fit()
+    decay = fitted.params[fitted.model.param_names.index('ar.L1')]
+    next_value = np.asarray(fitted.forecast(steps=1))[0]
+    return np.array([values[-1], next_value - values[-1], decay])
+
+#? Module level so it can be shipped to worker processes.
+#? Returns (product, fitted, error, seconds): fitted is None for products without sales,
+#? error carries the message of a failed fit, so one bad series never stops training, and
+#? seconds is the fit time measured in the worker for the per-product metrics.
+def _fit_product_forecast(task):
+    product, sales_series, profit_series = task
+    if sales_series.sum() == 0:
+        return product, None, None, None
+    started = time.perf_counter()
+    try:
+        if len(sales_series) >= 5:
+            sales_state = _arima_state(sales_series)
+            profit_state = _arima_state(profit_series)
+        else:
+            sales_state = np.array([sales_series.mean(), 0.0, 0.0])
+            profit_state = np.array([profit_series.mean(), 0.0, 0.0])
+        fitted = {
+            'sales_state': sales_state,
+            'profit_state': profit_state,
+            'historical_performance': {
+                'avg_monthly_sales': sales_series.mean(),
+                'avg_monthly_profit': profit_series.mean(),
+                'sales_trend': Models._calculate_trend(sales_series),
+                'profit_margin': (profit_series.sum() / sales_series.sum()) * 100 if sales_series.sum() > 0 else 0,
+                'consistency': 1 / (sales_series.std() + 1)
+            }
+        }
+        return product, fitted, None, time.perf_counter() - started
+    except Exception as e:
+        return product, None, str(e), time.perf_counter() - started
+
+#? Per-product fits keyed by a hash of the product's monthly series and the engine, so a
+#? retrain only refits products whose history actually changed, whatever the horizon.
+FIT_CACHE_PATH = "models/sales_fit_cache.pkl"
+_FIT_CACHE_VERSION = 2
+
+def _fit_cache_key(sales_series, profit_series, engine:str) -> str:
+    digest = hashlib.sha1(f"{_FIT_CACHE_VERSION}|{engine}".encode())
+    digest.update(np.asarray(sales_series.index.asi8).tobytes())
+    digest.update(sales_series.to_numpy(dtype=float).tobytes())
+    digest.update(profit_series.to_numpy(dtype=float).tobytes())
+    return digest.hexdigest()
+
+#? Engines accepted by create_sales_forecasting_model. 'arima' fits one statsmodels
+#? ARIMA(1,1,1) per product; the others fit every product at once with NumPy.
+FORECAST_ENGINES = ('arima', 'ar1', 'ses', 'drift')
+_SES_ALPHAS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+def _batch_forecast_states(values, method:str):
+    # values is a (months, products) matrix, returns a (products, 3) matrix of (level, step, decay)
+    n_obs, n_products = values.shape
+    zeros = np.zeros(n_products)
+    if n_obs < 5:
+        return np.column_stack([values.mean(axis=0), zeros, zeros])
+    last = values[-1]
+    if method == 'drift':
+        slope = (values[-1] - values[0]) / (n_obs - 1)
+        return np.column_stack([last, slope, np.ones(n_products)])
+    if method == 'ses':
+        # Run the smoothing recursion for every (alpha, product) pair at once and keep
+        # the alpha with the lowest one-step-ahead squared error per product
+        level = np.tile(values[0], (len(_SES_ALPHAS), 1))
+        sse = np.zeros_like(level)
+        alphas = np.asarray(_SES_ALPHAS)[:, None]
+        for row in values[1:]:
+            error = row - level
+            sse += error ** 2
+            level = level + alphas * error
+        best = sse.argmin(axis=0)
+        final_level = level[best, np.arange(n_products)]
+        return np.column_stack([final_level, zeros, zeros])
+    # 'ar1': least-squares AR(1) on the first differences, the vectorized cousin of ARIMA(1,1,1)
+    diffs = np.diff(values, axis=0)
+    lagged, current = diffs[:-1], diffs[1:]
+    denom = (lagged ** 2).sum(axis=0)
+    phi = np.divide((lagged * current).sum(axis=0), denom, out=np.zeros(n_products), where=denom > 0)
+    phi = np.clip(phi, -0.99, 0.99)
+    return np.column_stack([last, diffs[-1] * phi, phi])
+
+def _batch_fit_forecasts(sales_data, profit_data, method:str):
+    sales = sales_data.to_numpy(dtype=float)
+    profit = profit_data[sales_data.columns].to_numpy(dtype=float)
+    sales_states = _batch_forecast_states(sales, method)
+    profit_states = _batch_forecast_states(profit, method)
+
+    sales_sum = sales.sum(axis=0)
+    profit_sum = profit.sum(axis=0)
+    sales_mean = sales.mean(axis=0)
+    x = np.arange(len(sales)) - (len(sales) - 1) / 2
+    if len(sales) >= 2:
+        slope = (x[:, None] * (sales - sales_mean)).sum(axis=0) / (x ** 2).sum()
+        trend = np.divide(slope, sales_mean, out=np.zeros_like(slope), where=sales_mean != 0)
+    else:
+        trend = np.zeros(sales.shape[1])
+    margin = np.divide(profit_sum, sales_sum, out=np.zeros_like(sales_sum), where=sales_sum > 0) * 100
+    consistency = 1 / (sales.std(axis=0, ddof=1) + 1)
+    profit_mean = profit.mean(axis=0)
+
+    results = []
+    for i, product in enumerate(sales_data.columns):
+        if sales_sum[i] == 0:
+            results.append((product, None, None))
+            continue
+        results.append((product, {
+            'sales_state': sales_states[i],
+            'profit_state': profit_states[i],
+            'historical_performance': {
+                'avg_monthly_sales': sales_mean[i],
+                'avg_monthly_profit': profit_mean[i],
+                'sales_trend': trend[i],
+                'profit_margin': margin[i],
+                'consistency': consistency[i]
+            }
+        }, None))
+    return results
+
+#? 'forest' is the TF-IDF + RandomForest pipeline, 'similarity' a cosine top-k index
+#? over the same TF-IDF features.
+FASHION_ENGINES = ('forest', 'similarity')
+
+class FashionSimilarityIndex:
+    def __init__(self, vectorizer, product_matrix, products, default_product):
+        self.vectorizer = vectorizer
+        self.product_matrix = product_matrix
+        self.classes_ = np.asarray(products, dtype=object)
+        self.default_product = default_product
+
+    @classmethod
+    def build(cls, X, y):
+        vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
+        rows = vectorizer.fit_transform(X)
+        # Collapse the training rows of each product into one L2-normalised centroid row,
+        # so a single sparse dot product scores every product at once
+        products, row_product = np.unique(np.asarray(y, dtype=str), return_inverse=True)
+        membership = sparse.csr_matrix(
+            (np.ones(len(row_product)), (row_product, np.arange(len(row_product)))),
+            shape=(len(products), len(row_product))
+        )
+        product_matrix = normalize(membership @ rows, norm='l2').T.tocsr()
+        default_product = str(products[np.bincount(row_product).argmax()])
+        return cls(vectorizer, product_matrix, products, default_product)
+
+    def top_k(self, prompts, k:int=5):
+        k = max(1, k)
+        scores = (self.vectorizer.transform(prompts) @ self.product_matrix).tocsr()
+        ranked = []
+        for i in range(scores.shape[0]):
+            start, end = scores.indptr[i], scores.indptr[i + 1]
+            data, columns = scores.data[start:end], scores.indices[start:end]
+            if len(data) > k:
+                # Partial sort: keep everything tied with the k-th best score so ties break by product order
+                threshold = np.partition(data, len(data) - k)[len(data) - k]
+                keep = data >= threshold
+                data, columns = data[keep], columns[keep]
+            order = np.lexsort((columns, -data))[:k]
+            ranked.append([(self.classes_[columns[j]], float(data[j])) for j in order])
+        return ranked
+
+    def predict(self, prompts):
+        return np.array([
+            matches[0][0] if matches else self.default_product
+            for matches in self.top_k(prompts, k=1)
+        ], dtype=object)
+
+def fashion_top_k(model, prompts, k:int=5):
+    if hasattr(model, 'top_k'):
+        return model.top_k(prompts, k)
+    # Forest pipelines: rank the classes by their predicted probability
+    probabilities = model.predict_proba(prompts)
+    classes = model.classes_
+    k = max(1, min(k, len(classes)))
+    ranked = []
+    for row in probabilities:
+        threshold = np.partition(row, len(row) - k)[len(row) - k]
+        keep = np.flatnonzero(row >= threshold)
+        keep = keep[np.lexsort((keep, -row[keep]))][:k]
+        ranked.append([(classes[j], float(row[j])) for j in keep if row[j] > 0])
+    return ranked
+
+#? Column names are matched after lower-casing and dropping '_' / ' ', so created_at and createdAt both match
+FAKE_ACCOUNT_LABELS = ('isfake', 'fake', 'isfakeaccount', 'fakeaccount', 'isbot', 'bot', 'isfraud', 'fraud',
+                       'isspam', 'spam', 'label', 'target', 'class')
+EMAIL_COLUMNS = ('email', 'emailaddress', 'mail')
+NAME_COLUMNS = ('name', 'username', 'fullname', 'displayname')
+CREATED_COLUMNS = ('createdat', 'created', 'signupdate', 'signedupat', 'registeredat', 'joined', 'joinedat')
+DISPOSABLE_EMAIL_DOMAINS = frozenset((
+    'mailinator.com', 'guerrillamail.com', '10minutemail.com', 'tempmail.com', 'temp-mail.org', 'yopmail.com',
+    'trashmail.com', 'getnada.com', 'sharklasers.com', 'dispostable.com', 'maildrop.cc', 'throwawaymail.com'
+))
+_TRUE_LABELS = frozenset(('1', '1.0', 'true', 't', 'yes', 'y', 'fake', 'bot', 'fraud', 'spam', 'scam'))
+_FALSE_LABELS = frozenset(('0', '0.0', 'false', 'f', 'no', 'n', 'real', 'genuine', 'legit', 'legitimate', 'human'))
+
+def _column_key(name) -> str:
+    return str(name).lower().replace('_', '').replace(' ', '').replace('-', '')
+
+class FakeAccountDetector:
+    """
+    Fake account risk from one feature matrix per batch: every feature is a whole-column
+    pandas/numpy operation, scaled and scored by a single logistic regression
+    """
+    MAX_CATEGORIES = 20
+
+    def __init__(self, spec:dict, pipeline):
+        self.spec = spec
+        self.pipeline = pipeline
+        self.metrics = {}
+
+    @staticmethod
+    def find_label(columns) -> Optional[str]:
+        keys = {_column_key(column): column for column in columns}
+        return next((keys[key] for key in FAKE_ACCOUNT_LABELS if key in keys), None)
+
+    @staticmethod
+    def label_values(series):
+        """1 for fake, 0 for genuine, -1 where the label is missing or unrecognised"""
+        text = series.astype("string").str.strip().str.lower()
+        labels = np.full(len(series), -1, dtype=np.int8)
+        labels[text.isin(_TRUE_LABELS).fillna(False).to_numpy(dtype=bool)] = 1
+        labels[text.isin(_FALSE_LABELS).fillna(False).to_numpy(dtype=bool)] = 0
+        return labels
+
+    @classmethod
+    def feature_spec(cls, frame, label:str) -> dict:
+        keys = {_column_key(column): column for column in frame.columns}
+        spec = {
+            'email': next((keys[key] for key in EMAIL_COLUMNS if key in keys), None),
+            'name': next((keys[key] for key in NAME_COLUMNS if key in keys), None),
+            'created': next((keys[key] for key in CREATED_COLUMNS if key in keys), None),
+            'numeric': [],
+            'categorical': {}
+        }
+        special = {label, spec['email'], spec['name'], spec['created']}
+        for column in frame.columns:
+            if column in special:
+                continue
+            lowered = str(column).lower()
+            if lowered == 'id' or lowered.endswith('_id') or _column_key(column) in ('userid', 'accountid'):
+                continue
+            values = frame[column]
+            if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+                spec['numeric'].append(column)
+                continue
+            categories = values.dropna().astype(str).value_counts()
+            if 1 < len(categories) <= cls.MAX_CATEGORIES:
+                spec['categorical'][column] = sorted(categories.index)
+        return spec
+
+    @staticmethod
+    def _text(frame, column):
+        return frame[column].astype("string").str.strip().str.lower().fillna("")
+
+    @staticmethod
+    def _digit_ratio(text):
+        return (text.str.count(r"\d") / text.str.len().clip(lower=1)).to_numpy(dtype=float)
+
+    @classmethod
+    def features(cls, frame, spec:dict, fill:Optional[dict]=None):
+        """(matrix, feature names); missing values get the training medians in `fill`"""
+        columns = {}
+        for column in spec['numeric']:
+            values = frame[column] if column in frame.columns else pd.Series(np.nan, index=frame.index)
+            columns[str(column)] = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+        if spec['email'] is not None:
+            email = cls._text(frame, spec['email']) if spec['email'] in frame.columns else pd.Series("", index=frame.index, dtype="string")
+            parts = email.str.partition("@")
+            local, at, domain = parts[0], parts[1], parts[2]
+            columns['email_length'] = local.str.len().to_numpy(dtype=float)
+            columns['email_digit_ratio'] = cls._digit_ratio(local)
+            columns['email_has_plus'] = local.str.contains("+", regex=False).to_numpy(dtype=float)
+            columns['email_disposable'] = domain.isin(DISPOSABLE_EMAIL_DOMAINS).to_numpy(dtype=float)
+            columns['email_invalid'] = (at == "").to_numpy(dtype=float)
+        if spec['name'] is not None:
+            name = cls._text(frame, spec['name']) if spec['name'] in frame.columns else pd.Series("", index=frame.index, dtype="string")
+            columns['name_length'] = name.str.len().to_numpy(dtype=float)
+            columns['name_digit_ratio'] = cls._digit_ratio(name)
+            columns['name_single_word'] = (~name.str.contains(" ", regex=False)).to_numpy(dtype=float)
+        if spec['created'] is not None:
+            created = frame[spec['created']] if spec['created'] in frame.columns else pd.Series(None, index=frame.index)
+            created = cls._parse_dates(created)
+            age = (pd.Timestamp.now(tz='UTC') - created).dt.total_seconds() / 86400
+            columns['account_age_days'] = age.to_numpy(dtype=float)
+        for column, categories in spec['categorical'].items():
+            values = frame[column].astype(str).to_numpy() if column in frame.columns else np.full(len(frame), "", dtype=object)
+            onehot = values[:, None] == np.asarray(categories, dtype=object)[None, :]
+            for i, category in enumerate(categories):
+                columns[f"{column}={category}"] = onehot[:, i].astype(float)
+
+        names = list(columns)
+        matrix = np.column_stack([columns[name] for name in names]) if names else np.empty((len(frame), 0))
+        if fill is not None:
+            cls._fill_missing(matrix, names, fill)
+        return matrix, names
+
+    @staticmethod
+    def _parse_dates(values):
+        # Vectorized with the format of the first date; the rare rows in another format parse one by one
+        values = pd.Series(values)
+        present = values.dropna()
+        date_format = Models._guess_date_format(str(present.iloc[0])) if len(present) else None
+        parsed = pd.to_datetime(values, errors='coerce', utc=True, format=date_format)
+        leftover = parsed.isna() & values.notna()
+        if leftover.any():
+            parsed[leftover] = values[leftover].map(lambda value: pd.to_datetime(value, errors='coerce', utc=True))
+        return parsed
+
+    @staticmethod
+    def _fill_missing(matrix, names, fill:dict):
+        missing = np.isnan(matrix)
+        medians = np.array([fill.get(name, 0.0) for name in names])
+        matrix[missing] = medians[np.nonzero(missing)[1]]
+
+    @classmethod
+    def build(cls, frame, label:str):
+        labels = cls.label_values(frame[label])
+        known = labels >= 0
+        frame, labels = frame.loc[known], labels[known]
+        if len(np.unique(labels)) < 2:
+            raise ValueError(f"'{label}' needs both fake and genuine accounts, found {np.bincount(labels, minlength=2).tolist()}")
+        spec = cls.feature_spec(frame, label)
+        matrix, names = cls.features(frame, spec)
+        if not names:
+            raise ValueError("No usable feature columns")
+        # Columns that are entirely empty get 0 (nanmedian returns NaN for them)
+        fill = {name: 0.0 if np.isnan(value) else float(value) for name, value in zip(names, np.nanmedian(matrix, axis=0))}
+        cls._fill_missing(matrix, names, fill)
+        spec['fill'] = fill
+        spec['names'] = names
+        spec['label'] = label
+
+        def pipeline():
+            return Pipeline([
+                ('scale', StandardScaler()),
+                ('clf', LogisticRegression(max_iter=1000, class_weight='balanced'))
+            ])
+
+        detector = cls(spec, None)
+        if min(np.bincount(labels)) >= 5:
+            # Hold out a stratified fifth to report how well the scores rank unseen accounts
+            train, test = train_test_split(np.arange(len(labels)), test_size=0.2, stratify=labels, random_state=42)
+            holdout = pipeline().fit(matrix[train], labels[train])
+            probabilities = holdout.predict_proba(matrix[test])[:, 1]
+            flagged = probabilities >= 0.5
+            detector.metrics = {
+                'holdout_roc_auc': round(float(roc_auc_score(labels[test], probabilities)), 4),
+                'holdout_precision': round(float(labels[test][flagged].mean()), 4) if flagged.any() else None,
+                'holdout_recall': round(float(flagged[labels[test] == 1].mean()), 4),
+                'holdout_accounts': int(len(test))
+            }
+        detector.pipeline = pipeline().fit(matrix, labels)
+        detector.metrics.update({'accounts': int(len(labels)), 'fake_ratio': round(float(labels.mean()), 4),
+                                 'features': len(names)})
+        return detector
+
+    def score(self, frame, reasons:int=3):
+        """Fake probability per row and, per row, the features pushing it up the most"""
+        matrix, _ = self.features(frame, self.spec, self.spec['fill'])
+        scaled = self.pipeline.named_steps['scale'].transform(matrix)
+        contributions = scaled * self.pipeline.named_steps['clf'].coef_[0]
+        probabilities = self.pipeline.named_steps['clf'].predict_proba(scaled)[:, 1]
+        if reasons <= 0 or contributions.shape[1] == 0:
+            return probabilities, [[] for _ in range(len(frame))]
+        reasons = min(reasons, contributions.shape[1])
+        top = np.argsort(-contributions, axis=1)[:, :reasons]
+        top_values = np.take_along_axis(contributions, top, axis=1)
+        names = np.asarray(self.spec['names'], dtype=object)
+        explained = [names[row[values > 0]].tolist() for row, values in zip(top, top_values)]
+        return probabilities, explained
+
+PLOT_FORMATS = ('png', 'webp', 'svg')
+
+def safe_plot_name(product_name:str) -> str:
+    return product_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+
+def _rotate_xticks(ax):
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+
+def _figure_bytes(fig, fmt:str, dpi:int) -> bytes:
+    buffer = io.BytesIO()
+    FigureCanvasAgg(fig)
+    fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+#? DataFrames kept in the sales model for plots and series, never sent in the forecast summary
+SALES_FRAME_KEYS = ('sales_data', 'profit_data', 'sales_forecast_data', 'profit_forecast_data', 'forecast_state')
+
+FASHION_MODEL_NAME = "fashion_assistant"
+SALES_MODEL_NAME = "sales_forecaster"
+ADMIN_MODEL_NAME = "fake_account_detector"
+
 class Models:
     def __init__(self):
         #? Optional, you can delete it but recommended to keep it
         os.makedirs("models", exist_ok=True)
         os.makedirs("plots", exist_ok=True)
+        self.fit_cache = None
+        self.registry = ModelRegistry("models")
+        # Parsed CSV contents keyed on path, size and mtime; AIZY_DATA_CACHE=0 turns it off
+        self.data_cache = ParsedDataCache("models/data_cache", enabled=os.getenv("AIZY_DATA_CACHE", "1") != "0")
+        # Registry metadata of the artifact most recently saved or loaded, per model name
+        self.artifacts = {}
     
-    def create_fashion_model(self, filepath:str="fashion.csv"):
+    @timed("Models")
+    def _save_artifact(self, name:str, obj, source_path:str, params:dict, source_hash:Optional[str]=None, extra:Optional[dict]=None):
+        try:
+            metadata = self.registry.save(name, obj, source_path, params, source_hash, extra)
+            self.artifacts[name] = metadata
+            print(f"✅ Saved {name} v{metadata['version']} to {self.registry.root}/{name}/{metadata['file']}")
+        except Exception as e:
+            print(f"⚠️ Could not save {name} to the model registry: {e}")
+
+    @timed("Models")
+    def _load_artifact(self, name:str, source_path:str, params:Optional[dict]):
+        if not os.path.exists(source_path):
+            return None
+        obj, metadata = self.registry.load_latest(name, source_path, params)
+        if obj is None:
+            print(f"ℹ️ No saved {name} matches {source_path}" + (f" and {params}" if params is not None else "") + ", training is needed")
+            return None
+        self.artifacts[name] = metadata
+        print(f"✅ Loaded {name} v{metadata['version']} (trained {time.strftime('%Y-%m-%d %H:%M', time.localtime(metadata['created_at']))})")
+        return obj
+
+    @timed("Models")
+    def load_published(self, name:str):
+        """Newest version of `name` when it is newer than the one loaded here, else (None, None)"""
+        metadata = self.registry.latest(name)
+        current = self.artifacts.get(name)
+        if metadata is None or (current is not None and metadata["version"] <= current["version"]):
+            return None, None
+        try:
+            obj = self.registry.load(metadata)
+        except Exception as e:
+            print(f"⚠️ Could not load published {name} v{metadata['version']}: {e}")
+            return None, None
+        self.artifacts[name] = metadata
+        print(f"🔄 Loaded {name} v{metadata['version']} published by another worker")
+        return obj, metadata
+
+    def save_sales_forecasting_model(self, model, filepath:str, source_hash:Optional[str], order_log_offset:int):
+        """Publish a refreshed sales model; the orders logged before order_log_offset are already folded in"""
+        self._save_artifact(SALES_MODEL_NAME, model, filepath, {'engine': model.get('engine', 'arima')},
+                            source_hash=source_hash, extra={'order_log_offset': order_log_offset})
+
+    def load_fashion_model(self, filepath:str="fashion.csv", engine:str="forest"):
+        return self._load_artifact(FASHION_MODEL_NAME, filepath, {'engine': engine})
+
+    def load_sales_forecasting_model(self, filepath:str="./data/products.csv", months_to_forecast:Optional[int]=None):
+        """
+        Newest sales model trained on the current filepath, whatever its engine; fitted states do
+        not depend on the horizon, so it is re-projected over months_to_forecast when one is given
+        """
+        model = self._load_artifact(SALES_MODEL_NAME, filepath, None)
+        if model is None or months_to_forecast is None:
+            return model
+        try:
+            return self.forecast_horizon(model, months_to_forecast)
+        except ValueError as e:
+            print(f"ℹ️ {e}")
+            return None
+
+    def load_fake_account_model(self, filepath:str="./data/fake_accounts.csv"):
+        return self._load_artifact(ADMIN_MODEL_NAME, filepath, {'engine': 'logistic'})
+
+    @timed("Models")
+    def _prepare_fashion_data(self, filepath:str):
+        cached = self.data_cache.load(filepath, "fashion")
+        if cached is not None:
+            print(f"⚡ Using cached fashion features for {filepath}")
+            label = str(cached["label"][0]) or None
+            return pd.Series(cached["X"], name="features"), pd.Series(cached["y"], name=label)
+        data = pd.read_csv(filepath)
+        if data.empty:
+            print(f"❌ Fashion data file '{filepath}' is empty.")
+            return None
+        for col in ['category', 'gender', 'region', 'occasion']:
+            if col in data.columns:
+                data[col] = data[col].astype(str)
+            else:
+                data[col] = 'unknown'
+        
+        data['features'] = data['category'] + " " + data['gender'] + " " + \
+                            data['region'] + " " + data['occasion']
+        
+        X = data['features']
+        y = data['product_name'] if 'product_name' in data.columns else data.iloc[:, -1]
+        if pd.api.types.is_string_dtype(y) and not y.isna().any():
+            self.data_cache.save(filepath, "fashion", {
+                "X": X.to_numpy(dtype=str), "y": y.to_numpy(dtype=str), "label": np.asarray([str(y.name or "")])
+            })
+        return X, y
+
+    @timed("Models", falsy_is_failure=True)
+    def create_fashion_model(self, filepath:str="fashion.csv", engine:str="forest"):
         print(f"\n--- Creating Fashion Model from {filepath} ---")
+        if engine not in FASHION_ENGINES:
+            print(f"❌ Unknown fashion engine '{engine}'. Choose one of {', '.join(FASHION_ENGINES)}.")
+            return None
         try:
-            data = pd.read_csv(filepath)
-            if data.empty:
-                print(f"❌ Fashion data file '{filepath}' is empty.")
+            prepared = self._prepare_fashion_data(filepath)
+            if prepared is None:
                 return None
-            for col in ['category', 'gender', 'region', 'occasion']:
-                if col in data.columns:
-                    data[col] = data[col].astype(str)
-                else:
-                    data[col] = 'unknown'
-            
-            data['features'] = data['category'] + " " + data['gender'] + " " + \
-                                data['region'] + " " + data['occasion']
-            
-            X = data['features']
-            y = data['product_name'] if 'product_name' in data.columns else data.iloc[:, -1]
+            X, y = prepared
             
             if X.empty or y.empty:
                 print(f"❌ No features or target found after processing '{filepath}'.")
                 return None
+            if engine == 'similarity':
+                index = FashionSimilarityIndex.build(X, y)
+                print("✅ Fashion Similarity Index Created Successfully.")
+                self._save_artifact(FASHION_MODEL_NAME, index, filepath, {'engine': engine})
+                return index
             model_pipeline = Pipeline([
                         ('count', TfidfVectorizer(stop_words='english', max_features=1000)),
                         ('clf', RandomForestClassifier(random_state=42, n_estimators=100))
@@ -48,8 +592,7 @@ class Models:
 
             model_pipeline.fit(X, y)
             print("✅ Fashion Model Created and Trained Successfully.")
-            joblib.dump(model_pipeline, "models/fashion_assistant_model_created.pkl")
-            print("✅ Fashion Model saved to models/fashion_assistant_model_created.pkl")
+            self._save_artifact(FASHION_MODEL_NAME, model_pipeline, filepath, {'engine': engine})
             return model_pipeline
         except Exception as e:
             if e is FileNotFoundError:
@@ -58,40 +601,52 @@ class Models:
             print(f"❌ Error creating fashion model: {e}")
             return None
     
-    def create_sales_data_preprocessor(self, filepath:str="products.csv"):
+    @timed("Models")
+    def create_sales_data_preprocessor(self, filepath:str="products.csv", chunksize:Optional[int]=None):
         print(f"\n--- Preparing Sales Data from {filepath} ---")
         try: 
-            sales_data = pd.read_csv(filepath)
-            if sales_data.empty:
-                print("❌ Sales data file is empty. Use the dummy_dataset.py code to generate a few fake datasets.")
-                return None, None
-            date_col = next((col for col in sales_data.columns if 'date' in col.lower()), None)
-            product_col = next((col for col in sales_data.columns if 'product' in col.lower() and 'name' in col.lower()), None)
-            sales_col = next((col for col in sales_data.columns if col.lower() in ['sales', 'revenue', 'amount']), None)
-            profit_col = next((col for col in sales_data.columns if col.lower() in ['profit', 'margin']), None)
+            cached = self.data_cache.load(filepath, "sales")
+            if cached is not None:
+                print(f"⚡ Using cached monthly pivots for {filepath}")
+                return frame_from_arrays("sales", cached), frame_from_arrays("profit", cached)
+            if chunksize:
+                #? Stream the orders: only the month x product sums ever live in memory
+                columns = list(pd.read_csv(filepath, nrows=0).columns)
+            else:
+                with stage("Models", "read_csv"):
+                    sales_data = pd.read_csv(filepath)
+                if sales_data.empty:
+                    print("❌ Sales data file is empty. Use the dummy_dataset.py code to generate a few fake datasets.")
+                    return None, None
+                columns = list(sales_data.columns)
+            date_col = next((col for col in columns if 'date' in col.lower()), None)
+            product_col = next((col for col in columns if 'product' in col.lower() and 'name' in col.lower()), None)
+            sales_col = next((col for col in columns if col.lower() in ['sales', 'revenue', 'amount']), None)
+            profit_col = next((col for col in columns if col.lower() in ['profit', 'margin']), None)
 
             if not all([date_col, product_col, sales_col]):
-                print(f"❌ Required columns missing. Found: {list(sales_data.columns)}")
+                print(f"❌ Required columns missing. Found: {columns}")
                 return None, None
-
-            sales_data[date_col] = pd.to_datetime(sales_data[date_col], errors='coerce')
-            sales_data.dropna(subset=[date_col], inplace=True)
-            
             if profit_col is None:
-                profit_col = 'Profit'
-                sales_data[profit_col] = sales_data[sales_col] * 0.2
                 print("⚠️ No profit column found. Using 20% of sales as profit.")
+
+            if chunksize:
+                usecols = [c for c in (date_col, product_col, sales_col, profit_col) if c is not None]
+                monthly_data = self._stream_monthly_totals(filepath, chunksize, usecols, date_col, product_col, sales_col, profit_col)
+                if monthly_data is None:
+                    print("❌ Sales data file is empty. Use the dummy_dataset.py code to generate a few fake datasets.")
+                    return None, None
+            else:
+                monthly_data = self._monthly_totals(sales_data, date_col, product_col, sales_col, profit_col)
+            profit_col = profit_col or 'Profit'
+            with stage("Models", "pivot"):
+                monthly_data = monthly_data.reset_index()
+                sales_pivot = monthly_data.pivot(index=date_col, columns=product_col, values=sales_col).fillna(0)
+                profit_pivot = monthly_data.pivot(index=date_col, columns=product_col, values=profit_col).fillna(0)
                 
-            monthly_data = sales_data.groupby([
-                sales_data[date_col].dt.to_period("M"), product_col
-            ]).agg({
-                sales_col: 'sum', profit_col: 'sum'
-            }).reset_index()
-            sales_pivot = monthly_data.pivot(index=date_col, columns=product_col, values=sales_col).fillna(0)
-            profit_pivot = monthly_data.pivot(index=date_col, columns=product_col, values=profit_col).fillna(0)
-            
-            sales_pivot.index = cast(pd.PeriodIndex, sales_pivot.index).to_timestamp()
-            profit_pivot.index = cast(pd.PeriodIndex, profit_pivot.index).to_timestamp()
+                sales_pivot.index = cast(pd.PeriodIndex, sales_pivot.index).to_timestamp()
+                profit_pivot.index = cast(pd.PeriodIndex, profit_pivot.index).to_timestamp()
+            self.data_cache.save(filepath, "sales", {**frame_to_arrays("sales", sales_pivot), **frame_to_arrays("profit", profit_pivot)})
             
             print("✅ Sales Data Prepared Successfully!")
             return sales_pivot, profit_pivot
@@ -102,208 +657,508 @@ class Models:
         except Exception as e:
             print(f"❌ Error processing sales data: {e}")
             return None, None
+
+    @staticmethod
+    def _monthly_totals(sales_data, date_col:str, product_col:str, sales_col:str, profit_col:Optional[str], date_format:Optional[str]=None):
+        """Sales and profit summed per (month, product) for one frame of orders"""
+        with stage("Models", "parse_dates"):
+            if date_format:
+                sales_data[date_col] = pd.to_datetime(sales_data[date_col], errors='coerce', format=date_format)
+            else:
+                sales_data[date_col] = pd.to_datetime(sales_data[date_col], errors='coerce')
+            sales_data.dropna(subset=[date_col], inplace=True)
+        if profit_col is None:
+            profit_col = 'Profit'
+            sales_data[profit_col] = sales_data[sales_col] * 0.2
+        with stage("Models", "monthly_groupby"):
+            return sales_data.groupby([
+                sales_data[date_col].dt.to_period("M"), product_col
+            ]).agg({
+                sales_col: 'sum', profit_col: 'sum'
+            })
+
+    @timed("Models")
+    def _stream_monthly_totals(self, filepath:str, chunksize:int, usecols, date_col:str, product_col:str, sales_col:str, profit_col:Optional[str], collapse_every:int=32):
+        """Monthly totals built chunk by chunk; partial sums are folded together every few chunks"""
+        date_format = None
+        totals = None
+        partials = []
+        rows = 0
+        for chunk in pd.read_csv(filepath, usecols=usecols, chunksize=chunksize):
+            rows += len(chunk)
+            if date_format is None:
+                # Guess the format once, as a whole-file read would, so every chunk parses the same way
+                first = chunk[date_col].dropna()
+                if not first.empty:
+                    date_format = self._guess_date_format(str(first.iloc[0])) or ""
+            partials.append(self._monthly_totals(chunk, date_col, product_col, sales_col, profit_col, date_format or None))
+            if len(partials) >= collapse_every:
+                totals = self._combine_monthly_totals(totals, partials)
+                partials = []
+        if rows == 0:
+            return None
+        totals = self._combine_monthly_totals(totals, partials)
+        print(f"📦 Aggregated {rows} orders in chunks of {chunksize}")
+        return totals
+
+    @staticmethod
+    def _combine_monthly_totals(totals, partials):
+        frames = ([totals] if totals is not None else []) + partials
+        if not frames:
+            return totals
+        return pd.concat(frames).groupby(level=[0, 1]).sum()
+
+    @staticmethod
+    def _guess_date_format(value:str) -> Optional[str]:
+        try:
+            from pandas.tseries.api import guess_datetime_format
+        except ImportError:
+            return None
+        return guess_datetime_format(value)
     
-    def _calculate_trend(self, series):
+    @staticmethod
+    def _calculate_trend(series):
         if len(series) < 2:
             return 0
         x = np.arange(len(series))
         slope = np.polyfit(x, series, 1)[0]
         return slope / series.mean() if series.mean() != 0 else 0
-        
-    def create_sales_forecasting_model(self, filepath:str="./data/products.csv", months_to_forecast:int=3):
+
+    def _load_fit_cache(self):
+        if self.fit_cache is None:
+            self.fit_cache = {}
+            if os.path.exists(FIT_CACHE_PATH):
+                try:
+                    self.fit_cache = joblib.load(FIT_CACHE_PATH)
+                except Exception as e:
+                    print(f"⚠️ Ignoring unreadable fit cache {FIT_CACHE_PATH}: {e}")
+        return self.fit_cache
+
+    def _iter_forecast_fits(self, sales_data, profit_data, n_jobs:int, chunk_size:Optional[int], engine:str):
+        if sales_data.shape[1] == 0:
+            return
+        if engine != 'arima':
+            print(f"⚡ Fitting {sales_data.shape[1]} products with the vectorized '{engine}' engine")
+            with stage("Models", f"batch_fit[{engine}]"):
+                fits = _batch_fit_forecasts(sales_data, profit_data, engine)
+            # One vectorized pass has no per-product time
+            for product, fitted, error in fits:
+                yield product, fitted, error, None
+            return
+
+        tasks = [
+            (product, sales_data[product].astype(float), profit_data[product].astype(float))
+            for product in sales_data.columns
+        ]
+        workers = _resolve_n_jobs(n_jobs, len(tasks))
+        if workers > 1:
+            if chunk_size is None:
+                chunk_size = max(1, math.ceil(len(tasks) / (workers * 4)))
+            print(f"⚙️ Fitting {len(tasks)} products on {workers} worker processes (chunk size {chunk_size})")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_process_pool_context()) as executor:
+                yield from executor.map(_fit_product_forecast, tasks, chunksize=chunk_size)
+            return
+        for task in tasks:
+            yield _fit_product_forecast(task)
+
+    @timed("Models")
+    def _fit_sales_forecasts(self, sales_data, profit_data, months_to_forecast:int=3, n_jobs:int=1, chunk_size:Optional[int]=None, engine:str="arima", use_cache:bool=True, progress_callback=None, reuse:Optional[dict]=None):
+        # `reuse` holds fits known to match the current series (e.g. products no new order touched)
+        products = list(sales_data.columns)
+        keys = {}
+        cached = {product: fitted for product, fitted in (reuse or {}).items() if product in sales_data.columns}
+        if use_cache:
+            fit_cache = self._load_fit_cache()
+            for product in products:
+                keys[product] = _fit_cache_key(sales_data[product], profit_data[product], engine)
+                if product not in cached and keys[product] in fit_cache:
+                    cached[product] = fit_cache[keys[product]]
+        if cached:
+            print(f"♻️ Reusing {len(cached)} product fits, refitting {len(products) - len(cached)}")
+
+        dirty = [product for product in products if product not in cached]
+        fitted_by_product = {product: (fitted, None) for product, fitted in cached.items()}
+        if progress_callback:
+            progress_callback(len(fitted_by_product), len(products))
+        for product, fitted, error, seconds in self._iter_forecast_fits(sales_data[dirty], profit_data[dirty], n_jobs, chunk_size, engine):
+            fitted_by_product[product] = (fitted, error)
+            if seconds is not None:
+                FIT_SECONDS.observe(seconds, engine=engine)
+            if error is not None:
+                FIT_FAILURES.inc(engine=engine)
+            if progress_callback:
+                progress_callback(len(fitted_by_product), len(products))
+
+        if use_cache:
+            # Only keep fits for the series we just saw, so the cache never outgrows the catalogue
+            self.fit_cache = {
+                keys[product]: fitted for product, (fitted, error) in fitted_by_product.items() if error is None
+            }
+            try:
+                # Through a temp file: other worker processes may be reading it
+                tmp_path = f"{FIT_CACHE_PATH}.{os.getpid()}.tmp"
+                joblib.dump(self.fit_cache, tmp_path)
+                os.replace(tmp_path, FIT_CACHE_PATH)
+            except Exception as e:
+                print(f"⚠️ Could not persist fit cache: {e}")
+
+        return self._collect_forecasts([(product, *fitted_by_product[product]) for product in products], months_to_forecast)
+
+    def _collect_forecasts(self, results, months_to_forecast:int):
+        products, sales_states, profit_states, performance = [], [], [], {}
+        for product, fitted, error in results:
+            if error is not None:
+                print(f"⚠️ Skipping forecast for {product}: {error[:100]}")
+                continue
+            if fitted is None:
+                continue
+            products.append(product)
+            sales_states.append(fitted['sales_state'])
+            profit_states.append(fitted['profit_state'])
+            performance[product] = fitted['historical_performance']
+        state = pd.DataFrame(
+            np.hstack([np.reshape(sales_states, (-1, 3)), np.reshape(profit_states, (-1, 3))]),
+            index=pd.Index(products, name='product_name'), columns=FORECAST_STATE_COLUMNS
+        )
+        return self._forecasts_from_state(state, performance, months_to_forecast)
+
+    @staticmethod
+    def _forecasts_from_state(state, performance:dict, months_to_forecast:int):
+        # One matrix expression for every product, which is what makes a new horizon cheap
+        products = list(state.index)
+        values = state.to_numpy(dtype=float)
+        sales_paths = forecast_paths(values[:, 0:3], months_to_forecast)
+        profit_paths = forecast_paths(values[:, 3:6], months_to_forecast)
+        sales_totals = np.maximum(0, sales_paths.sum(axis=1)).tolist()
+        profit_totals = np.maximum(0, profit_paths.sum(axis=1)).tolist()
+        return {
+            'sales_forecasts': dict(zip(products, sales_totals)),
+            'profit_forecasts': dict(zip(products, profit_totals)),
+            'historical_performance': {product: performance[product] for product in products},
+            'sales_paths': dict(zip(products, sales_paths)),
+            'profit_paths': dict(zip(products, profit_paths)),
+            'state': state
+        }
+
+    @timed("Models", falsy_is_failure=True)
+    def create_sales_forecasting_model(self, filepath:str="./data/products.csv", months_to_forecast:int=3, n_jobs:int=1, chunk_size:Optional[int]=None, engine:str="arima", use_cache:bool=True, progress_callback=None, read_chunksize:Optional[int]=None):
         print(f"\n--- Creating Sales Forecasting Model (forecasting {months_to_forecast} months) ---")
+        if engine not in FORECAST_ENGINES:
+            print(f"❌ Unknown forecasting engine '{engine}'. Choose one of {', '.join(FORECAST_ENGINES)}.")
+            return None
         try:
-            result = self.create_sales_data_preprocessor(filepath)
+            result = self.create_sales_data_preprocessor(filepath, chunksize=read_chunksize)
             if result is None or len(result) != 2:  
                 return None
             sales_data, profit_data = result
-            if sales_data.empty or profit_data.empty:  
+            if sales_data is None or profit_data is None or sales_data.empty or profit_data.empty:  
                 print("❌ No data available for forecasting")
                 return None
-            forecasts = {
-                'sales_forecasts': {},
-                'profit_forecasts': {},
-                'historical_performance': {}
-            }
-            for product in sales_data.columns:
-                sales_series = sales_data[product].astype(float)
-                profit_series = profit_data[product].astype(float)
-                
-                if sales_series.sum() == 0:
-                    continue
-                
-                try:
-                    has_enough_data = len(sales_series) >= 5
-                    
-                    if has_enough_data:
-                        sales_model = ARIMA(sales_series, order=(1, 1, 1), 
-                                            enforce_stationarity=False, enforce_invertibility=False)
-                        sales_forecast = sales_model.fit().forecast(steps=months_to_forecast)
-                    else:
-                        sales_forecast = pd.Series([sales_series.mean()] * months_to_forecast)
-                    if has_enough_data:
-                        profit_model = ARIMA(profit_series, order=(1, 1, 1),
-                                            enforce_stationarity=False, enforce_invertibility=False)
-                        profit_forecast = profit_model.fit().forecast(steps=months_to_forecast)
-                    else:
-                        profit_forecast = pd.Series([profit_series.mean()] * months_to_forecast)
-                    forecasts['sales_forecasts'][product] = max(0, sales_forecast.sum())
-                    forecasts['profit_forecasts'][product] = max(0, profit_forecast.sum())
-                    forecasts['historical_performance'][product] = {
-                        'avg_monthly_sales': sales_series.mean(),
-                        'avg_monthly_profit': profit_series.mean(),
-                        'sales_trend': self._calculate_trend(sales_series),
-                        'profit_margin': (profit_series.sum() / sales_series.sum()) * 100 if sales_series.sum() > 0 else 0,
-                        'consistency': 1 / (sales_series.std() + 1)
-                    }
-                    
-                except Exception as e:
-                    print(f"⚠️ Skipping forecast for {product}: {str(e)[:100]}")
-                    continue
-
-            if not forecasts['sales_forecasts']:
-                print("📉 No products available for forecasting.")
+            forecasts = self._fit_sales_forecasts(sales_data, profit_data, months_to_forecast, n_jobs, chunk_size, engine, use_cache, progress_callback)
+            forecasting_results = self._summarise_forecasts(sales_data, profit_data, forecasts, months_to_forecast, engine)
+            if forecasting_results is None:
                 return None
-
-            sales_f = forecasts['sales_forecasts']
-            profit_f = forecasts['profit_forecasts']
-            hist_perf = forecasts['historical_performance']
-            best_sales_product = max(sales_f, key=lambda k: sales_f[k])
-            best_profit_product = max(profit_f, key=lambda k: profit_f[k])
-            
-            profitability_scores = {}
-            for product in profit_f:
-                if product in hist_perf:
-                    score = (profit_f[product] * 
-                           hist_perf[product]['consistency'] * 
-                                (1 + hist_perf[product]['sales_trend']))
-                    profitability_scores[product] = max(0, score)
-            
-            best_overall_product = max(profitability_scores, key=lambda k: profitability_scores[k]) if profitability_scores else best_profit_product
-            forecasting_results = {
-                'sales_forecasts': sales_f,
-                'profit_forecasts': profit_f,
-                'historical_performance': hist_perf,
-                'best_sales_product': best_sales_product,
-                'best_profit_product': best_profit_product,
-                'best_overall_product': best_overall_product,
-                'profitability_scores': profitability_scores,
-                'months_forecasted': months_to_forecast,
-                'sales_data': sales_data,
-                'profit_data': profit_data
-            }
-            joblib.dump(forecasting_results, "models/sales_forecasting_model.pkl")
+            self._save_artifact(SALES_MODEL_NAME, forecasting_results, filepath, {'engine': engine})
             print("✅ Sales Forecasting Model created and saved")
             return forecasting_results
         except Exception as e:
             print(f"❌ Error creating forecasting model: {e}")
             return None
+
+    @timed("Models")
+    def _summarise_forecasts(self, sales_data, profit_data, forecasts, months_to_forecast:int, engine:str):
+        if not forecasts['sales_forecasts']:
+            print("📉 No products available for forecasting.")
+            return None
+
+        sales_f = forecasts['sales_forecasts']
+        profit_f = forecasts['profit_forecasts']
+        hist_perf = forecasts['historical_performance']
+        best_sales_product = max(sales_f, key=lambda k: sales_f[k])
+        best_profit_product = max(profit_f, key=lambda k: profit_f[k])
+        
+        profitability_scores = {}
+        for product in profit_f:
+            if product in hist_perf:
+                score = (profit_f[product] * 
+                       hist_perf[product]['consistency'] * 
+                            (1 + hist_perf[product]['sales_trend']))
+                profitability_scores[product] = max(0, score)
+        
+        best_overall_product = max(profitability_scores, key=lambda k: profitability_scores[k]) if profitability_scores else best_profit_product
+        # Month-by-month forecast paths, laid out like the historical pivots
+        forecast_index = pd.date_range(sales_data.index[-1] + pd.offsets.MonthBegin(1), periods=months_to_forecast, freq='MS')
+        return {
+            'sales_forecasts': sales_f,
+            'profit_forecasts': profit_f,
+            'historical_performance': hist_perf,
+            'best_sales_product': best_sales_product,
+            'best_profit_product': best_profit_product,
+            'best_overall_product': best_overall_product,
+            'profitability_scores': profitability_scores,
+            'months_forecasted': months_to_forecast,
+            'engine': engine,
+            'sales_data': sales_data,
+            'profit_data': profit_data,
+            'sales_forecast_data': pd.DataFrame(forecasts['sales_paths'], index=forecast_index),
+            'profit_forecast_data': pd.DataFrame(forecasts['profit_paths'], index=forecast_index),
+            'forecast_state': forecasts['state']
+        }
+
+    @timed("Models")
+    def forecast_horizon(self, model, months:int):
+        """The sales model re-projected over `months` from its fitted states, without refitting"""
+        if months == model['months_forecasted']:
+            return model
+        state = model.get('forecast_state')
+        if state is None:
+            raise ValueError(f"This sales model predates per-product forecast states and only covers "
+                             f"{model['months_forecasted']} months, retrain it to change the horizon")
+        forecasts = self._forecasts_from_state(state, model['historical_performance'], months)
+        return self._summarise_forecasts(model['sales_data'], model['profit_data'], forecasts,
+                                         months, model.get('engine', 'arima'))
+
+    @staticmethod
+    def fold_orders(sales_data, profit_data, orders):
+        """Copies of the monthly pivots with `orders` added; returns (sales, profit, summary)"""
+        frame = pd.DataFrame(list(orders), columns=['date', 'product_name', 'sales', 'profit'])
+        frame['date'] = pd.to_datetime(frame['date'], errors='coerce')
+        frame['sales'] = pd.to_numeric(frame['sales'], errors='coerce')
+        frame['profit'] = pd.to_numeric(frame['profit'], errors='coerce')
+        valid = frame['date'].notna() & frame['sales'].notna() & frame['product_name'].notna()
+        rejected = [int(i) for i in np.flatnonzero(~valid.to_numpy())]
+        frame = frame[valid]
+        # Same fallback as the CSV preprocessor when no profit is given
+        frame['profit'] = frame['profit'].fillna(frame['sales'] * 0.2)
+        frame['month'] = frame['date'].dt.to_period("M").dt.to_timestamp()
+        totals = frame.groupby(['month', 'product_name'])[['sales', 'profit']].sum()
+
+        months = pd.DatetimeIndex(totals.index.get_level_values(0).unique(), name=sales_data.index.name)
+        touched = list(dict.fromkeys(totals.index.get_level_values(1)))
+        new_months = [month for month in months if month not in sales_data.index]
+        new_products = [product for product in touched if product not in sales_data.columns]
+        index = sales_data.index.union(months) if new_months else sales_data.index
+        columns = pd.Index(list(sales_data.columns) + new_products, name=sales_data.columns.name)
+
+        # Reindexing copies, so models already handed out keep their pivots untouched
+        sales = sales_data.reindex(index=index, columns=columns, fill_value=0).astype(float)
+        profit = profit_data.reindex(index=index, columns=columns, fill_value=0).astype(float)
+        if not totals.empty:
+            sales_added = totals['sales'].unstack(fill_value=0)
+            profit_added = totals['profit'].unstack(fill_value=0)
+            sales.loc[sales_added.index, sales_added.columns] += sales_added
+            profit.loc[profit_added.index, profit_added.columns] += profit_added
+        return sales, profit, {
+            'accepted': int(valid.sum()),
+            'rejected': rejected,
+            'touched_products': touched,
+            'new_products': new_products,
+            'new_months': [month.strftime("%Y-%m-%d") for month in new_months]
+        }
+
+    @timed("Models")
+    def apply_sales_orders(self, model, orders):
+        """New sales model with orders folded in; the forecasts of touched products are marked pending"""
+        sales, profit, summary = self.fold_orders(model['sales_data'], model['profit_data'], orders)
+        pending = set(model.get('pending_products') or [])
+        if summary['new_months']:
+            # A new month adds a zero to every other series too, so every product needs a refit
+            pending.update(sales.columns)
+        else:
+            pending.update(summary['touched_products'])
+        updated = dict(model)
+        updated['sales_data'] = sales
+        updated['profit_data'] = profit
+        updated['pending_products'] = sorted(pending, key=str)
+        summary['pending_products'] = len(pending)
+        return updated, summary
+
+    @timed("Models", falsy_is_failure=True)
+    def refresh_sales_forecasting_model(self, model, n_jobs:int=1, use_cache:bool=True, progress_callback=None):
+        """Refit only the pending products of `model`, reusing every other product's forecast"""
+        sales_data, profit_data = model['sales_data'], model['profit_data']
+        pending = set(model.get('pending_products') or [])
+        months_to_forecast = model['months_forecasted']
+        engine = model.get('engine', 'arima')
+        state = model.get('forecast_state')
+        reuse = {}
+        if state is not None:
+            values = state.to_numpy(dtype=float)
+            for row, product in enumerate(state.index):
+                if product not in pending and product in model['historical_performance']:
+                    reuse[product] = {
+                        'sales_state': values[row, 0:3],
+                        'profit_state': values[row, 3:6],
+                        'historical_performance': model['historical_performance'][product]
+                    }
+        print(f"🔁 Refreshing forecasts for {len(pending)} products with new orders")
+        try:
+            forecasts = self._fit_sales_forecasts(sales_data, profit_data, months_to_forecast, n_jobs, None, engine,
+                                                  use_cache, progress_callback, reuse=reuse)
+            return self._summarise_forecasts(sales_data, profit_data, forecasts, months_to_forecast, engine)
+        except Exception as e:
+            print(f"❌ Error refreshing forecasts: {e}")
+            return None
         
+    @timed("Models", falsy_is_failure=True)
+    def create_fake_account_model(self, filepath:str="./data/fake_accounts.csv"):
+        print(f"\n--- Creating Fake Account Detection Model from {filepath} ---")
+        try:
+            with stage("Models", "read_csv"):
+                data = pd.read_csv(filepath)
+            if data.empty:
+                print(f"❌ Account data file '{filepath}' is empty.")
+                return None
+            label = FakeAccountDetector.find_label(data.columns)
+            if label is None:
+                print(f"❌ No label column in '{filepath}', expected one of: is_fake, is_bot, is_fraud, label, target")
+                return None
+            detector = FakeAccountDetector.build(data, label)
+            print(f"✅ Fake Account Model trained on {detector.metrics['accounts']} accounts "
+                  f"({detector.metrics['features']} features, holdout ROC AUC {detector.metrics.get('holdout_roc_auc', 'n/a')})")
+            self._save_artifact(ADMIN_MODEL_NAME, detector, filepath, {'engine': 'logistic'})
+            return detector
+        except FileNotFoundError:
+            print(f"❌ Account data file not found at '{filepath}', use the dummy_dataset.py code to generate a fake dataset.")
+            return None
+        except Exception as e:
+            print(f"❌ Error creating fake account model: {e}")
+            return None
+
+    def _draw_comprehensive_figure(self, forecasting_results):
+        sales_f = forecasting_results['sales_forecasts']
+        profit_f = forecasting_results['profit_forecasts'] 
+        hist_perf = forecasting_results['historical_performance']
+        months = forecasting_results['months_forecasted']
+        
+        products = list(sales_f.keys())[:10]
+        
+        # Figure objects instead of pyplot state, so requests can render concurrently
+        fig = Figure(figsize=(20, 15))
+        
+        # 1. Sales forecast comparison
+        ax = fig.add_subplot(2, 3, 1)
+        sales_values = [sales_f[p] for p in products]
+        ax.bar(products, sales_values, color='skyblue')
+        ax.set_title(f'Sales Forecast - Next {months} Months', fontweight='bold')
+        ax.set_xlabel('Products')
+        ax.set_ylabel('Sales ($)')
+        _rotate_xticks(ax)
+        
+        # 2. Profit forecast comparison
+        ax = fig.add_subplot(2, 3, 2)
+        profit_values = [profit_f[p] for p in products]
+        ax.bar(products, profit_values, color='lightgreen')
+        ax.set_title(f'Profit Forecast - Next {months} Months', fontweight='bold')
+        _rotate_xticks(ax)
+        
+        # 3. Profit Margin Analysis
+        ax = fig.add_subplot(2, 3, 3)
+        margins = [hist_perf[p]['profit_margin'] for p in products if p in hist_perf]
+        product_names = [p for p in products if p in hist_perf]
+        colors = ['red' if m < 15 else 'orange' if m < 25 else 'green' for m in margins]
+        ax.bar(product_names, margins, color=colors, alpha=0.7)
+        ax.set_title('Profit Margin by Product (%)', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Products')
+        ax.set_ylabel('Profit Margin (%)')
+        _rotate_xticks(ax)
+        ax.axhline(y=20, color='red', linestyle='--', alpha=0.5, label='Target: 20%')
+        ax.legend()
+        
+        # 4. Sales Trend Analysis
+        ax = fig.add_subplot(2, 3, 4)
+        trends = [hist_perf[p]['sales_trend'] for p in products if p in hist_perf]
+        colors = ['red' if t < 0 else 'green' for t in trends]
+        ax.bar(product_names, trends, color=colors, alpha=0.7)
+        ax.set_title('Sales Trend Direction', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Products')
+        ax.set_ylabel('Trend Score')
+        _rotate_xticks(ax)
+        ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+        
+        # 5. Revenue vs Profit Scatter
+        ax = fig.add_subplot(2, 3, 5)
+        x_sales = [sales_f[p] for p in products]
+        y_profit = [profit_f[p] for p in products]
+        ax.scatter(x_sales, y_profit, alpha=0.7, s=100, c='purple')
+        for i, product in enumerate(products):
+            ax.annotate(product[:15], (x_sales[i], y_profit[i]), 
+                        xytext=(5, 5), textcoords='offset points', fontsize=8)
+        ax.set_title('Revenue vs Profit Forecast', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Forecasted Sales ($)')
+        ax.set_ylabel('Forecasted Profit ($)')
+        ax.grid(True, alpha=0.3)
+        
+        # 6. Top 5 Recommended Products
+        ax = fig.add_subplot(2, 3, 6)
+        # Calculate overall scores for top recommendations
+        overall_scores = {}
+        for product in products:
+            if product in hist_perf:
+                score = (profit_f[product] * 0.4 + 
+                        sales_f[product] * 0.3 + 
+                        hist_perf[product]['consistency'] * 1000 * 0.3)
+                overall_scores[product] = score
+        
+        top_5 = sorted(overall_scores.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_products, top_scores = zip(*top_5)
+        
+        bars = ax.barh(top_products, top_scores, color='gold', alpha=0.7)
+        ax.set_title('Top 5 Recommended Products\n(Overall Score)', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Overall Score')
+        ax.invert_yaxis()
+        
+        for bar, score in zip(bars, top_scores):
+            ax.text(bar.get_width() + max(top_scores)*0.01, bar.get_y() + bar.get_height()/2,
+                    f'{score:,.0f}', ha='left', va='center', fontsize=10, fontweight='bold')
+        
+        fig.tight_layout()
+        return fig
+
+    def _draw_product_figure(self, product_name:str, sales_data, profit_data):
+        if product_name not in sales_data.columns:
+            return None
+            
+        fig = Figure(figsize=(12, 8))
+        
+        historical_sales = sales_data[product_name]
+        historical_profit = profit_data[product_name] if product_name in profit_data.columns else historical_sales * 0.2
+        ax = fig.add_subplot(2, 1, 1)
+        ax.plot(historical_sales.index, historical_sales.values, marker='o', linewidth=2, label='Historical Sales', color='blue')
+        ax.set_title(f'Sales Analysis for {product_name}', fontsize=16, fontweight='bold')
+        ax.set_ylabel('Sales ($)')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        ax = fig.add_subplot(2, 1, 2)
+        ax.plot(historical_profit.index, historical_profit.values, marker='s', linewidth=2, label='Historical Profit', color='green')
+        ax.set_title(f'Profit Analysis for {product_name}', fontsize=16, fontweight='bold')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Profit ($)')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        return fig
+
+    @timed("Models")
+    def render_comprehensive_plot(self, forecasting_results, fmt:str="png", dpi:int=300) -> bytes:
+        return _figure_bytes(self._draw_comprehensive_figure(forecasting_results), fmt, dpi)
+
+    @timed("Models")
+    def render_product_plot(self, product_name:str, forecasting_results, fmt:str="png", dpi:int=300) -> Optional[bytes]:
+        fig = self._draw_product_figure(product_name, forecasting_results['sales_data'], forecasting_results['profit_data'])
+        return _figure_bytes(fig, fmt, dpi) if fig is not None else None
+
     def create_forecast_visualizations(self, forecasting_results):
         if not forecasting_results:
             print("❌ No forecasting results available for visualization.")
             return False
             
         try:
-            # Set matplotlib to use Agg backend to avoid GUI issues
-            plt.switch_backend('Agg')
-            
-            sales_f = forecasting_results['sales_forecasts']
-            profit_f = forecasting_results['profit_forecasts'] 
-            hist_perf = forecasting_results['historical_performance']
-            months = forecasting_results['months_forecasted']
-            best_product = forecasting_results['best_overall_product']
-            
-            products = list(sales_f.keys())[:10]
-            
-            plt.figure(figsize=(20, 15))
-            
-            # 1. Sales forecast comparison
-            plt.subplot(2, 3, 1)
-            sales_values = [sales_f[p] for p in products]
-            bars = plt.bar(products, sales_values, color='skyblue')
-            plt.title(f'Sales Forecast - Next {months} Months', fontweight='bold')
-            plt.xlabel('Products')
-            plt.ylabel('Sales ($)')
-            plt.xticks(rotation=45, ha='right')
-            
-            # 2. Profit forecast comparison
-            plt.subplot(2, 3, 2)
-            profit_values = [profit_f[p] for p in products]
-            plt.bar(products, profit_values, color='lightgreen')
-            plt.title(f'Profit Forecast - Next {months} Months', fontweight='bold')
-            plt.xticks(rotation=45, ha='right')
-            
-            # 3. Profit Margin Analysis
-            plt.subplot(2, 3, 3)
-            margins = [hist_perf[p]['profit_margin'] for p in products if p in hist_perf]
-            product_names = [p for p in products if p in hist_perf]
-            colors = ['red' if m < 15 else 'orange' if m < 25 else 'green' for m in margins]
-            bars = plt.bar(product_names, margins, color=colors, alpha=0.7)
-            plt.title('Profit Margin by Product (%)', fontsize=14, fontweight='bold')
-            plt.xlabel('Products')
-            plt.ylabel('Profit Margin (%)')
-            plt.xticks(rotation=45, ha='right')
-            plt.axhline(y=20, color='red', linestyle='--', alpha=0.5, label='Target: 20%')
-            plt.legend()
-            plt.tight_layout()
-            
-            # 4. Sales Trend Analysis
-            plt.subplot(2, 3, 4)
-            trends = [hist_perf[p]['sales_trend'] for p in products if p in hist_perf]
-            colors = ['red' if t < 0 else 'green' for t in trends]
-            bars = plt.bar(product_names, trends, color=colors, alpha=0.7)
-            plt.title('Sales Trend Direction', fontsize=14, fontweight='bold')
-            plt.xlabel('Products')
-            plt.ylabel('Trend Score')
-            plt.xticks(rotation=45, ha='right')
-            plt.axhline(y=0, color='black', linestyle='-', alpha=0.3)
-            plt.tight_layout()
-            
-            # 5. Revenue vs Profit Scatter
-            plt.subplot(2, 3, 5)
-            x_sales = [sales_f[p] for p in products]
-            y_profit = [profit_f[p] for p in products]
-            plt.scatter(x_sales, y_profit, alpha=0.7, s=100, c='purple')
-            for i, product in enumerate(products):
-                plt.annotate(product[:15], (x_sales[i], y_profit[i]), 
-                            xytext=(5, 5), textcoords='offset points', fontsize=8)
-            plt.title('Revenue vs Profit Forecast', fontsize=14, fontweight='bold')
-            plt.xlabel('Forecasted Sales ($)')
-            plt.ylabel('Forecasted Profit ($)')
-            plt.grid(True, alpha=0.3)
-            
-            # 6. Top 5 Recommended Products
-            plt.subplot(2, 3, 6)
-            # Calculate overall scores for top recommendations
-            overall_scores = {}
-            for product in products:
-                if product in hist_perf:
-                    score = (profit_f[product] * 0.4 + 
-                            sales_f[product] * 0.3 + 
-                            hist_perf[product]['consistency'] * 1000 * 0.3)
-                    overall_scores[product] = score
-            
-            top_5 = sorted(overall_scores.items(), key=lambda x: x[1], reverse=True)[:5]
-            top_products, top_scores = zip(*top_5)
-            
-            bars = plt.barh(top_products, top_scores, color='gold', alpha=0.7)
-            plt.title('Top 5 Recommended Products\n(Overall Score)', fontsize=14, fontweight='bold')
-            plt.xlabel('Overall Score')
-            plt.gca().invert_yaxis()
-            
-            for bar, score in zip(bars, top_scores):
-                plt.text(bar.get_width() + max(top_scores)*0.01, bar.get_y() + bar.get_height()/2,
-                        f'{score:,.0f}', ha='left', va='center', fontsize=10, fontweight='bold')
-            
-            plt.tight_layout()
-            
-            plt.savefig('plots/comprehensive_seller_analysis.png', dpi=300, bbox_inches='tight')
+            with open('plots/comprehensive_seller_analysis.png', 'wb') as f:
+                f.write(self.render_comprehensive_plot(forecasting_results))
             print(f"✅ Comprehensive analysis plot saved as 'plots/comprehensive_seller_analysis.png'")
             
-            self._plot_individual_forecast(best_product, forecasting_results['sales_data'], forecasting_results['profit_data'])
-            
-            plt.close('all')  # Close all figures to free memory
+            self._plot_individual_forecast(forecasting_results['best_overall_product'], forecasting_results)
             return True
             
         except Exception as e:
@@ -312,30 +1167,11 @@ class Models:
             traceback.print_exc()
             return False
             
-    def _plot_individual_forecast(self, product_name : str, sales_data, profit_data):
-        if product_name not in sales_data.columns:
+    def _plot_individual_forecast(self, product_name : str, forecasting_results):
+        image = self.render_product_plot(product_name, forecasting_results)
+        if image is None:
             return
-            
-        plt.switch_backend('Agg')  # Ensure Agg backend
-        plt.figure(figsize=(12, 8))
-        
-        historical_sales = sales_data[product_name]
-        historical_profit = profit_data[product_name] if product_name in profit_data.columns else historical_sales * 0.2
-        plt.subplot(2, 1, 1)
-        plt.plot(historical_sales.index, historical_sales.values, marker='o', linewidth=2, label='Historical Sales', color='blue')
-        plt.title(f'Sales Analysis for {product_name}', fontsize=16, fontweight='bold')
-        plt.ylabel('Sales ($)')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.subplot(2, 1, 2)
-        plt.plot(historical_profit.index, historical_profit.values, marker='s', linewidth=2, label='Historical Profit', color='green')
-        plt.title(f'Profit Analysis for {product_name}', fontsize=16, fontweight='bold')
-        plt.xlabel('Date')
-        plt.ylabel('Profit ($)')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        safe_filename = product_name.replace(' ', '_').replace('/', '_')
-        plt.savefig(f'plots/{safe_filename}_detailed_analysis.png', dpi=300, bbox_inches='tight')
-        print(f"✅ Detailed analysis for {product_name} saved as 'plots/{safe_filename}_detailed_analysis.png'")
-        plt.close('all')  # Close all figures
\ No newline at end of file
+        safe_filename = safe_plot_name(product_name)
+        with open(f'plots/{safe_filename}_detailed_analysis.png', 'wb') as f:
+            f.write(image)
+        print(f"✅ Detailed analysis for {product_name} saved as 'plots/{safe_filename}_detailed_analysis.png'")
\ No newline at end of file
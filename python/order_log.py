@@ -0,0 +1,58 @@
+"""
+Append-only log of sales orders ingested through the API
+Each line is one batch tagged with the hash of the sales CSV it was applied on top
+of, so the orders can be replayed after a restart or a retrain on the same file.
+Byte offsets into the log order the batches across worker processes appending to it
+"""
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+class OrderLog:
+    def __init__(self, path:str="data/sales_orders.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, source_hash:Optional[str], orders:list):
+        """Durably record a batch before it becomes visible to readers; returns its (start, end) offsets"""
+        entry = {"source_hash": source_hash, "received_at": time.time(), "orders": orders}
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # One O_APPEND write per batch, so lines from other processes never interleave
+            with open(self.path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                end = f.tell()
+        return end - len(line), end
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def read_range(self, source_hash:Optional[str], start:int=0, end:Optional[int]=None):
+        """Orders for this source logged between two offsets, and the offset the read stopped at"""
+        orders = []
+        if not os.path.exists(self.path):
+            return orders, start
+        with self._lock, open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read() if end is None else f.read(max(0, end - start))
+        # Only whole lines: a batch still being written is picked up by the next read
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn line from a crash mid-write: that batch was never acknowledged
+                continue
+            if entry.get("source_hash") == source_hash:
+                orders.extend(entry.get("orders", []))
+        return orders, start + len(complete)
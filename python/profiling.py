@@ -0,0 +1,180 @@
+"""
+Opt-in request profiling
+A sampling profiler walks the stacks of every thread while a request is in flight, so the
+work it hands to the threadpool, the inference pool and Models is captured too. Profiles
+are stored as folded stacks (flamegraph.pl / speedscope format) in a bounded ring on disk
+"""
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+#? Leaf functions of threads that are parked rather than doing work
+IDLE_FUNCTIONS = {"wait", "select", "poll", "epoll", "_wait_for_tstate_lock", "_worker", "acquire", "sleep", "accept"}
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    def __init__(self, interval:float=0.005, max_seconds:float=60.0):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="aizy-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if frame.f_code.co_name in IDLE_FUNCTIONS:
+                    self.idle_samples += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class ProfileStore:
+    def __init__(self, root:str="profiles", keep:int=50):
+        self.root = root
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def _paths(self, profile_id:str):
+        return os.path.join(self.root, f"{profile_id}.json"), os.path.join(self.root, f"{profile_id}.folded")
+
+    def save(self, metadata:dict, folded:str):
+        os.makedirs(self.root, exist_ok=True)
+        meta_path, folded_path = self._paths(metadata["id"])
+        with self._lock:
+            with open(folded_path, "w", encoding="utf-8") as f:
+                f.write(folded)
+            # Metadata last: a profile is only listed once its stacks are on disk
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, indent=2)
+            for old in self.list()[self.keep:]:
+                for path in self._paths(old["id"]):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def list(self):
+        """Metadata of the stored profiles, newest first"""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for entry in os.listdir(self.root):
+            if not entry.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.root, entry), encoding="utf-8") as f:
+                    found.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(found, key=lambda m: m.get("started_at", 0), reverse=True)
+
+    def load(self, profile_id:str) -> Optional[str]:
+        # Ids are generated here, anything else could be a path traversal attempt
+        if not profile_id.replace("-", "").isalnum():
+            return None
+        _, folded_path = self._paths(profile_id)
+        if not os.path.exists(folded_path):
+            return None
+        with open(folded_path, encoding="utf-8") as f:
+            return f.read()
+
+class RequestProfiling:
+    """
+    Decides which requests get profiled and allows a single capture at a time. Stacks expose
+    internals, so without an admin token profiling is off altogether
+    """
+    def __init__(self, store:ProfileStore, sample_rate:float=0.0, interval:float=0.005,
+                 max_seconds:float=60.0, token:Optional[str]=None):
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.token = token
+        self._busy = threading.Lock()
+        self.captured = 0
+        self.skipped_busy = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def trigger(self, headers, query_params) -> Optional[str]:
+        """Why this request should be profiled ('header', 'query', 'sample') or None"""
+        if not self.enabled:
+            return None
+        requested = None
+        if headers.get("x-aizy-profile", "").lower() in ("1", "true", "yes"):
+            requested = "header"
+        elif query_params.get("profile", "").lower() in ("1", "true", "yes"):
+            requested = "query"
+        if requested and self.authorised(headers):
+            return requested
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def authorised(self, headers) -> bool:
+        return self.enabled and hmac.compare_digest(headers.get("x-admin-token", "").encode(), self.token.encode())
+
+    def begin(self) -> Optional[SamplingProfiler]:
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+        profiler = SamplingProfiler(self.interval, self.max_seconds)
+        profiler.start()
+        return profiler
+
+    def finish(self, profiler:SamplingProfiler, started:float, duration:float, **details) -> str:
+        try:
+            folded = profiler.stop()
+        finally:
+            self._busy.release()
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{uuid.uuid4().hex[:8]}"
+        metadata = {
+            "id": profile_id,
+            "started_at": started,
+            "duration_ms": round(duration * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": profiler.samples,
+            "idle_samples": profiler.idle_samples,
+            "stacks": len(profiler.stacks),
+            **details
+        }
+        try:
+            self.store.save(metadata, folded)
+            self.captured += 1
+        except Exception as e:
+            print(f"⚠️ Could not store profile {profile_id}: {e}")
+        return profile_id
@@ -0,0 +1,123 @@
+"""
+Versioned on-disk model registry
+Each artifact under models/<name>/ carries metadata (source file hash, training
+parameters, timestamp) so startup can reuse it instead of retraining
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+from cluster import FileLock
+
+class ModelRegistry:
+    def __init__(self, root:str="models", keep:int=3):
+        self.root = root
+        self.keep = keep
+        # Version numbers are allocated under this, so concurrent worker processes never collide
+        self._write_lock = FileLock(os.path.join(root, ".write.lock"))
+
+    @staticmethod
+    def file_hash(path:Optional[str]) -> Optional[str]:
+        if not path or not os.path.exists(path):
+            return None
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _same_params(a:Optional[dict], b:Optional[dict]) -> bool:
+        return json.dumps(a or {}, sort_keys=True, default=str) == json.dumps(b or {}, sort_keys=True, default=str)
+
+    def _model_dir(self, name:str) -> str:
+        return os.path.join(self.root, name)
+
+    def versions(self, name:str):
+        """Metadata of every complete artifact for `name`, newest first"""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        found = []
+        for entry in os.listdir(model_dir):
+            if not entry.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(model_dir, entry)) as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if os.path.exists(os.path.join(model_dir, metadata.get("file", ""))):
+                found.append(metadata)
+        return sorted(found, key=lambda m: m["version"], reverse=True)
+
+    def latest(self, name:str) -> Optional[dict]:
+        versions = self.versions(name)
+        return versions[0] if versions else None
+
+    def latest_version(self, name:str) -> int:
+        latest = self.latest(name)
+        return latest["version"] if latest else 0
+
+    def save(self, name:str, obj, source_path:Optional[str]=None, params:Optional[dict]=None, source_hash:Optional[str]=None, extra:Optional[dict]=None) -> dict:
+        with self._write_lock:
+            return self._save(name, obj, source_path, params, source_hash, extra)
+
+    def _save(self, name:str, obj, source_path:Optional[str], params:Optional[dict], source_hash:Optional[str], extra:Optional[dict]) -> dict:
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        version = self.latest_version(name) + 1
+        filename = f"v{version:04d}.joblib"
+        metadata = {
+            "name": name,
+            "version": version,
+            "file": filename,
+            "source_path": source_path,
+            "source_hash": source_hash or self.file_hash(source_path),
+            "params": params or {},
+            "created_at": time.time(),
+            **(extra or {})
+        }
+        # Write artifact then metadata through temp files: readers only see complete versions
+        import joblib
+        tmp_path = os.path.join(model_dir, f".{filename}.{os.getpid()}.tmp")
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, os.path.join(model_dir, filename))
+        tmp_meta = os.path.join(model_dir, f".v{version:04d}.json.{os.getpid()}.tmp")
+        with open(tmp_meta, "w") as f:
+            json.dump(metadata, f, indent=2, default=str)
+        os.replace(tmp_meta, os.path.join(model_dir, f"v{version:04d}.json"))
+        self._prune(name)
+        return metadata
+
+    def _prune(self, name:str):
+        model_dir = self._model_dir(name)
+        for metadata in self.versions(name)[self.keep:]:
+            for filename in (f"v{metadata['version']:04d}.json", metadata["file"]):
+                try:
+                    os.remove(os.path.join(model_dir, filename))
+                except OSError:
+                    pass
+
+    def load(self, metadata:dict, mmap:bool=True):
+        """The artifact of one version; with mmap its arrays are shared through the page cache"""
+        import joblib
+        return joblib.load(os.path.join(self._model_dir(metadata["name"]), metadata["file"]), mmap_mode="r" if mmap else None)
+
+    def load_latest(self, name:str, source_path:Optional[str]=None, params:Optional[dict]=None, mmap:bool=True):
+        """
+        Newest artifact trained on the current contents of source_path with the same params
+        (any params when None), else (None, None)
+        """
+        source_hash = self.file_hash(source_path) if source_path else None
+        for metadata in self.versions(name):
+            if source_path and metadata.get("source_hash") != source_hash:
+                continue
+            if params is not None and not self._same_params(metadata.get("params"), params):
+                continue
+            try:
+                return self.load(metadata, mmap), metadata
+            except Exception as e:
+                print(f"⚠️ Skipping unreadable artifact {name} v{metadata['version']}: {e}")
+        return None, None
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, HTTPException, Response
 from fastapi.responses import HTMLResponse, JSONResponse
 from ai import EcommerceAI
+from service import get_ai, run_inference
 from pydantic import BaseModel
+from typing import List
 
 router = APIRouter()
 
-# Initialize AI instance for routes
-ai_instance = EcommerceAI()
-
 class FashionQuery(BaseModel):
     prompt: str
 
+class FashionBatchQuery(BaseModel):
+    prompts: List[str]
+
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Home page showing available AI services"""
@@ -31,6 +33,7 @@ async def home(request: Request):
         <div class="service">
             <h2>👗 Fashion Assistant</h2>
             <div class="endpoint">POST /ai/fashion/query - Get fashion recommendations</div>
+            <div class="endpoint">POST /ai/fashion/query/batch - Get recommendations for many prompts at once</div>
             <div class="endpoint">POST /ai/fashion/train - Train fashion model</div>
         </div>
         
@@ -52,10 +55,23 @@ async def home(request: Request):
     return HTMLResponse(content=html_content)
 
 @router.post("/fashion/recommend")
-async def fashion_recommend(query: FashionQuery):
+async def fashion_recommend(query: FashionQuery, response: Response, ai_instance: EcommerceAI = Depends(get_ai)):
     """Fashion recommendation endpoint for routes"""
     try:
-        result = ai_instance.fashion_assistant(query.prompt)
+        result, _ = await run_inference(response, ai_instance.fashion_assistant, query.prompt)
         return {"success": True, "recommendation": result}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/fashion/recommend/batch")
+async def fashion_recommend_batch(query: FashionBatchQuery, response: Response, ai_instance: EcommerceAI = Depends(get_ai)):
+    """Batch fashion recommendation endpoint for routes"""
+    try:
+        results, _ = await run_inference(response, ai_instance.fashion_assistant_batch, query.prompts)
+        return {"success": True, "recommendations": results}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
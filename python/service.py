@@ -0,0 +1,191 @@
+"""
+The model service shared by every router
+One EcommerceAI per process, handed to endpoints through FastAPI dependencies. Models load
+on first use; their memory footprint and load time are tracked, and the least recently used
+ones are evicted when the total goes over AIZY_MODEL_MEMORY_BUDGET_MB. Predictions of every
+router go through one bounded inference pool
+"""
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+from ai import EcommerceAI
+from inference import InferencePool, InferenceOverloaded
+from startup import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+_ATOMIC = (str, bytes, int, float, bool, complex, type(None))
+
+def _array_root(array):
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+def _is_mapped(root) -> bool:
+    import mmap
+    return isinstance(root, np.memmap) or isinstance(root.base, mmap.mmap)
+
+def model_footprint(obj) -> dict:
+    """
+    Approximate memory held by a model: numpy buffers (counting shared views once), pandas
+    objects and plain Python containers. Memory-mapped arrays are reported apart, as their
+    pages live in the OS page cache and are shared with the other worker processes
+    """
+    private = mapped = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, _ATOMIC):
+            private += sys.getsizeof(item)
+        elif isinstance(item, np.ndarray):
+            root = _array_root(item)
+            if id(root) in seen and root is not item:
+                continue
+            seen.add(id(root))
+            if _is_mapped(root):
+                mapped += root.nbytes
+            else:
+                private += root.nbytes
+            if root.dtype == object:
+                stack.extend(root.ravel().tolist())
+        elif isinstance(item, (pd.DataFrame, pd.Series, pd.Index)):
+            if isinstance(item, pd.DataFrame):
+                stack.extend([item.index, item.columns])
+                stack.extend(column for _, column in item.items())
+            else:
+                if isinstance(item, pd.Series):
+                    stack.append(item.index)
+                stack.append(item.to_numpy())
+        elif isinstance(item, dict):
+            private += sys.getsizeof(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            private += sys.getsizeof(item)
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            private += sys.getsizeof(item)
+            stack.extend(vars(item).values())
+        else:
+            # Extension types such as sklearn's Tree expose their buffers through the pickle state
+            private += sys.getsizeof(item)
+            try:
+                state = item.__getstate__()
+            except Exception:
+                state = None
+            if isinstance(state, dict):
+                stack.extend(state.values())
+    return {"bytes": private, "mapped_bytes": mapped}
+
+class ModelService:
+    def __init__(self, memory_budget_mb:Optional[float]=None):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self._ai: Optional[EcommerceAI] = None
+        self._lock = threading.Lock()
+        # name -> (generation, footprint); measured once per published snapshot
+        self._footprints = {}
+        self._budget_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._ai is not None
+
+    @property
+    def ai(self) -> EcommerceAI:
+        """The process-wide EcommerceAI, created on first use"""
+        if self._ai is None:
+            with self._lock:
+                if self._ai is None:
+                    ai = EcommerceAI()
+                    for holder, _ in ai.model_holders().values():
+                        holder.on_publish = self._on_publish
+                    self._ai = ai
+        return self._ai
+
+    def ensure(self, name:str, progress_callback=None):
+        """Snapshot of one model, loading it (once, shared by concurrent callers) if it is not in memory"""
+        holder, warm_up = self.ai.model_holders()[name]
+        return holder.ensure(lambda: warm_up(progress_callback=progress_callback))
+
+    def footprint(self, name:str) -> Optional[dict]:
+        holder, _ = self.ai.model_holders()[name]
+        snapshot = holder.peek()
+        if snapshot is None:
+            return None
+        cached = self._footprints.get(name)
+        if cached is not None and cached[0] == snapshot.generation:
+            return cached[1]
+        started = time.perf_counter()
+        footprint = model_footprint(snapshot.model)
+        footprint["measured_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        self._footprints[name] = (snapshot.generation, footprint)
+        return footprint
+
+    def _on_publish(self, name:str, snapshot):
+        if self.memory_budget is not None:
+            self.enforce_budget(keep=name)
+
+    def enforce_budget(self, keep:Optional[str]=None):
+        """Evict least recently used models until the loaded ones fit the budget; returns the evicted names"""
+        evicted = []
+        if self.memory_budget is None or self._ai is None:
+            return evicted
+        with self._budget_lock:
+            holders = self._ai.model_holders()
+            while True:
+                loaded = {}
+                for name, (holder, _) in holders.items():
+                    footprint = self.footprint(name)
+                    if footprint is not None:
+                        loaded[name] = footprint["bytes"] + footprint["mapped_bytes"]
+                total = sum(loaded.values())
+                candidates = [name for name in loaded if name != keep]
+                if total <= self.memory_budget or not candidates:
+                    break
+                victim = min(candidates, key=lambda name: holders[name][0].last_used)
+                if holders[victim][0].evict():
+                    evicted.append(victim)
+                    print(f"♻️ Evicted {victim} ({loaded[victim] / 1024 / 1024:.1f} MB) to stay under the "
+                          f"{self.memory_budget / 1024 / 1024:.0f} MB model memory budget")
+                self._footprints.pop(victim, None)
+        return evicted
+
+    def stats(self) -> dict:
+        if self._ai is None:
+            return {"memory_budget_bytes": self.memory_budget, "models": {}}
+        models = {}
+        for name, (holder, _) in self._ai.model_holders().items():
+            models[name] = {**holder.stats(), "footprint": self.footprint(name)}
+        return {"memory_budget_bytes": self.memory_budget, "models": models}
+
+model_service = ModelService(memory_budget_mb=float(os.getenv("AIZY_MODEL_MEMORY_BUDGET_MB", "0")) or None)
+
+def get_ai() -> EcommerceAI:
+    """FastAPI dependency: the shared EcommerceAI"""
+    return model_service.ai
+
+inference_pool = InferencePool(
+    workers=int(os.getenv("AIZY_INFERENCE_WORKERS", "4")),
+    max_in_flight=int(os.getenv("AIZY_INFERENCE_MAX_IN_FLIGHT", "0")),
+    max_queue=int(os.getenv("AIZY_INFERENCE_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("AIZY_INFERENCE_QUEUE_TIMEOUT", "2.0"))
+)
+
+async def run_inference(response: Response, fn, *args):
+    """fn(*args) on the shared inference pool as (result, timing); a 503 when the pool is saturated"""
+    try:
+        result, timing = await inference_pool.run(fn, *args)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=f"Fashion assistant is busy: {e}", headers={"Retry-After": "1"})
+    response.headers["Server-Timing"] = f"queue;dur={timing['queue_ms']}, compute;dur={timing['compute_ms']}"
+    return result, timing
@@ -2,11 +2,12 @@
 Simple FastAPI server starter
 Run this instead of using uvicorn directly
 """
+import argparse
 import subprocess
 import sys
 import os
 
-def start_server():
+def start_server(workers:int=1):
     """Start the FastAPI server using the fastapi CLI"""
     try:
         print("🚀 Starting Ecommerce AI API Server...")
@@ -19,9 +20,15 @@ def start_server():
         
         # Use fastapi run for production (no auto-reload to prevent constant restarts)
         cmd = [sys.executable, "-m", "fastapi", "run", "main.py", "--host", "127.0.0.1", "--port", "8000"]
+        env = dict(os.environ)
+        if workers > 1:
+            # One worker is elected to train, the others share its models through models/
+            print(f"👥 Starting {workers} workers sharing one model store")
+            cmd += ["--workers", str(workers)]
+            env["AIZY_WORKERS"] = str(workers)
         
         # Start the server
-        subprocess.run(cmd, cwd=os.path.dirname(__file__))
+        subprocess.run(cmd, cwd=os.path.dirname(__file__), env=env)
         
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
@@ -30,4 +37,8 @@ def start_server():
         print("💡 Try running: python -m fastapi run main.py --host 127.0.0.1 --port 8000")
 
 if __name__ == "__main__":
-    start_server()
+    parser = argparse.ArgumentParser(description="Start the Ecommerce AI API server")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("AIZY_WORKERS", "1")),
+                        help="worker processes; one trains and the others load its models read-only")
+    args = parser.parse_args()
+    start_server(args.workers)
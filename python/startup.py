@@ -0,0 +1,87 @@
+"""
+Lazy imports and startup timing
+Heavy libraries (pandas, sklearn, statsmodels, matplotlib) are only imported the
+first time a model needs them, so the API can bind its port straight away
+"""
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+PROCESS_STARTED = time.time()
+
+class StartupTimer:
+    def __init__(self):
+        self.imports = {}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record_import(self, name:str, seconds:float):
+        with self._lock:
+            self.imports[name] = round(seconds, 4)
+
+    @contextmanager
+    def stage(self, name:str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = round(time.perf_counter() - started, 4)
+
+    def report(self):
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - PROCESS_STARTED, 3),
+                "imports": dict(sorted(self.imports.items(), key=lambda item: item[1], reverse=True)),
+                "stages": dict(self.stages)
+            }
+
+startup_timer = StartupTimer()
+
+class LazyModule:
+    def __init__(self, name:str, before_import=None, after_import=None):
+        self._name = name
+        self._before_import = before_import
+        self._after_import = after_import
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    if self._before_import:
+                        self._before_import()
+                    module = importlib.import_module(self._name)
+                    if self._after_import:
+                        self._after_import()
+                    startup_timer.record_import(self._name, time.perf_counter() - started)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+class LazyCallable:
+    def __init__(self, module:str, attr:str, after_import=None):
+        self._module = lazy_module(module, after_import=after_import)
+        self._attr = attr
+
+    def __call__(self, *args, **kwargs):
+        return getattr(self._module, self._attr)(*args, **kwargs)
+
+_lazy_modules = {}
+
+def lazy_module(name:str, before_import=None, after_import=None) -> LazyModule:
+    if name not in _lazy_modules:
+        _lazy_modules[name] = LazyModule(name, before_import, after_import)
+    return _lazy_modules[name]
+
+def lazy_callable(module:str, attr:str, after_import=None) -> LazyCallable:
+    return LazyCallable(module, attr, after_import)
@@ -0,0 +1,37 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PYTHON_DIR)
+
+SAMPLE_SALES = os.path.join(PYTHON_DIR, "data", "products.csv")
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Scratch working directory: Models writes models/ and plots/ relative to it"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    """TestClient on the app serving the sample sales data, trained with the fast 'ar1' engine"""
+    root = tmp_path_factory.mktemp("api")
+    os.makedirs(root / "data")
+    shutil.copy(SAMPLE_SALES, root / "data" / "products.csv")
+    previous_dir = os.getcwd()
+    previous_engine = os.environ.get("AIZY_FORECAST_ENGINE")
+    os.chdir(root)
+    os.environ["AIZY_FORECAST_ENGINE"] = "ar1"
+    from fastapi.testclient import TestClient
+    import main
+    try:
+        yield TestClient(main.app)
+    finally:
+        os.chdir(previous_dir)
+        if previous_engine is None:
+            os.environ.pop("AIZY_FORECAST_ENGINE", None)
+        else:
+            os.environ["AIZY_FORECAST_ENGINE"] = previous_engine
@@ -0,0 +1,25 @@
+"""Admin endpoints: token checks and request validation"""
+import pytest
+
+import auth
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "s3cret")
+    return "s3cret"
+
+def test_admin_endpoints_are_disabled_without_a_configured_token(api, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", None)
+    response = api.post("/ai/admin/accounts/score", json={"accounts": []}, headers={"X-Admin-Token": "anything"})
+    assert response.status_code == 503
+
+def test_wrong_token_is_rejected(api, admin_token):
+    response = api.post("/ai/admin/accounts/score", json={"accounts": []}, headers={"X-Admin-Token": "guess"})
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "X-Admin-Token"
+
+@pytest.mark.parametrize("top", [0, -3])
+def test_account_scoring_rejects_a_non_positive_top(api, admin_token, top):
+    response = api.post("/ai/admin/accounts/score", json={"accounts": [{}], "top": top},
+                        headers={"X-Admin-Token": admin_token})
+    assert response.status_code == 422
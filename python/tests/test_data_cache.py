@@ -0,0 +1,39 @@
+"""Parsed data cache: pivots round-trip through .npz with their labels intact"""
+import pandas as pd
+import pytest
+
+from data_cache import ParsedDataCache, frame_from_arrays, frame_to_arrays
+
+def _pivot(columns):
+    index = pd.DatetimeIndex(["2024-01-01", "2024-02-01"], name="Order Date")
+    return pd.DataFrame([[1.0, 2.0], [3.0, 4.0]], index=index, columns=pd.Index(columns, name="Product Name"))
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_text("placeholder\n")
+    return str(path)
+
+@pytest.mark.parametrize("columns", [["Chair", "Desk"], [1001, 1002], [1.5, 2.5]])
+def test_pivot_round_trips_with_label_types(tmp_path, source, columns):
+    cache = ParsedDataCache(str(tmp_path / "cache"))
+    pivot = _pivot(columns)
+    cache.save(source, "sales", frame_to_arrays("sales", pivot))
+
+    restored = frame_from_arrays("sales", cache.load(source, "sales"))
+    pd.testing.assert_frame_equal(restored, pivot, check_freq=False)
+    assert restored.columns.tolist() == columns
+    assert cache.stats()["hits"] == 1
+
+def test_mixed_labels_are_not_cached(tmp_path, source):
+    cache = ParsedDataCache(str(tmp_path / "cache"))
+    cache.save(source, "sales", frame_to_arrays("sales", _pivot(["Chair", 1002])))
+    assert cache.load(source, "sales") is None
+
+def test_changed_source_misses(tmp_path, source):
+    cache = ParsedDataCache(str(tmp_path / "cache"))
+    cache.save(source, "sales", frame_to_arrays("sales", _pivot(["Chair", "Desk"])))
+    with open(source, "a") as f:
+        f.write("more rows\n")
+    assert cache.load(source, "sales") is None
+    assert cache.stats()["misses"] == 1
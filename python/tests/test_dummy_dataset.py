@@ -0,0 +1,33 @@
+"""The fast CSV writer behind the synthetic datasets"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from dummy_dataset import Dummy_Dataset
+
+def _write(frame):
+    buffer = io.StringIO()
+    buffer.write(Dummy_Dataset._csv_line(frame.columns) + "\n")
+    Dummy_Dataset._write_csv_chunk(buffer, frame)
+    return buffer.getvalue()
+
+def test_chunk_writer_quotes_like_to_csv():
+    frame = pd.DataFrame({
+        "product": ['Chair, "Deluxe"', "Desk\nTop", None, "Lamp"],
+        "segment": pd.Categorical(["Home, Office", None, "Consumer", "Home, Office"]),
+        "note": pd.Series(["plain", 7, np.nan, "a,b"], dtype=object),
+        "sales": [1.5, np.nan, 2.0, 3.0],
+        "quantity": [1, 2, 3, 4]
+    })
+    written = _write(frame)
+    assert written == frame.to_csv(index=False, lineterminator="\n")
+    pd.testing.assert_frame_equal(pd.read_csv(io.StringIO(written)),
+                                  pd.read_csv(io.StringIO(frame.to_csv(index=False))))
+
+def test_generated_sales_data_round_trips(tmp_path):
+    path = tmp_path / "sales.csv"
+    rows = Dummy_Dataset(seed=1)._create_dummy_sales_data(str(path), n_products=4, days=20)
+    frame = pd.read_csv(path)
+    assert len(frame) == rows
+    assert frame["product_name"].nunique() == 4
@@ -0,0 +1,42 @@
+"""Fashion answers with suggestions come from one ranking pass"""
+import os
+import shutil
+
+import pytest
+
+from ai import EcommerceAI
+from conftest import PYTHON_DIR
+from model import FASHION_ENGINES
+
+PROMPTS = ["red summer dress for a beach party", "warm winter jacket", "zzz qqq"]
+
+@pytest.fixture(params=FASHION_ENGINES)
+def assistant(request, workdir):
+    source = os.path.join(PYTHON_DIR, "data", "fashion.csv")
+    os.makedirs(workdir / "data")
+    shutil.copy(source, workdir / "data" / "fashion.csv")
+    ai = EcommerceAI()
+    assert ai.train_fashion_assistant("./data/fashion.csv", engine=request.param)
+    return ai
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_answer_is_the_top_suggestion(assistant, prompt):
+    recommendation, suggestions = assistant.fashion_assistant_with_suggestions(prompt, 3)
+    assert len(suggestions) <= 3
+    if suggestions:
+        assert recommendation.endswith(f"I recommend: {suggestions[0]['product']}")
+    # Same answer as the plain (and now cached) assistant
+    assert assistant.fashion_assistant(prompt) == recommendation
+    assistant.fashion_cache.clear()
+    assert assistant.fashion_assistant(prompt) == recommendation
+
+def test_prompt_goes_through_the_model_once(assistant, monkeypatch):
+    model = assistant.fashion.get().model
+    calls = []
+    for name in ("top_k", "predict", "predict_proba"):
+        if hasattr(model, name):
+            original = getattr(model, name)
+            monkeypatch.setattr(model, name, lambda *args, _name=name, _original=original, **kwargs:
+                                calls.append(_name) or _original(*args, **kwargs))
+    assistant.fashion_assistant_with_suggestions(PROMPTS[0], 5)
+    assert len(calls) == 1
@@ -0,0 +1,61 @@
+"""Conditional GETs on the cached forecast response and plots"""
+import main
+
+def _forecast(api, months=None, **headers):
+    params = {"months": months} if months is not None else {}
+    return api.get("/ai/sales/forecast", params=params, headers={"Accept-Encoding": "identity", **headers})
+
+def test_matching_if_none_match_is_304_with_empty_body(api):
+    first = _forecast(api)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    for if_none_match in (etag, f'"stale", {etag}', "*"):
+        revalidated = _forecast(api, **{"If-None-Match": if_none_match})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.headers["x-model-version"] == first.headers["x-model-version"]
+
+    assert _forecast(api, **{"If-None-Match": '"stale"'}).status_code == 200
+
+def test_gzip_representation_has_its_own_etag(api):
+    plain = _forecast(api).headers["etag"]
+    gzipped = api.get("/ai/sales/forecast", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] != plain
+    assert _forecast(api, **{"If-None-Match": gzipped.headers["etag"]}).status_code == 200
+
+def test_months_changes_the_etag(api):
+    default = _forecast(api)
+    six = _forecast(api, months=6)
+    assert six.status_code == 200
+    assert six.headers["etag"] != default.headers["etag"]
+    assert _forecast(api, months=6, **{"If-None-Match": default.headers["etag"]}).status_code == 200
+    assert _forecast(api, months=6, **{"If-None-Match": six.headers["etag"]}).status_code == 304
+
+def test_new_model_version_changes_the_etag(api):
+    before = _forecast(api)
+    assert main.model_service.ai.train_sales_forecaster("./data/products.csv", 3, engine="ar1", incremental=False)
+
+    after = _forecast(api, **{"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.headers["x-model-version"] != before.headers["x-model-version"]
+    assert after.headers["etag"] != before.headers["etag"]
+
+def test_weak_validators_match(api):
+    etag = _forecast(api).headers["etag"]
+    assert _forecast(api, **{"If-None-Match": "W/" + etag}).status_code == 304
+
+def test_plot_revalidation_accepts_lists_wildcards_and_weak_tags(api):
+    first = api.get("/plots/comprehensive_seller_analysis.svg")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    for if_none_match in (etag, f'"stale", {etag}', "W/" + etag, "*"):
+        revalidated = api.get("/plots/comprehensive_seller_analysis.svg", headers={"If-None-Match": if_none_match})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+    assert api.get("/plots/comprehensive_seller_analysis.svg", headers={"If-None-Match": '"stale"'}).status_code == 200
@@ -0,0 +1,62 @@
+"""Forecasts re-projected from the stored (level, step, decay) states against fits for that horizon"""
+import numpy as np
+import pytest
+
+from conftest import SAMPLE_SALES
+from model import ARIMA, FORECAST_ENGINES, Models, _arima_state, forecast_paths
+
+@pytest.fixture
+def models(workdir):
+    return Models()
+
+@pytest.fixture
+def pivots(models):
+    sales, profit = models.create_sales_data_preprocessor(SAMPLE_SALES)
+    # The busiest products, so ARIMA has some history to work with; the vectorized engines get them all
+    busiest = (sales > 0).sum().sort_values(ascending=False, kind="stable").index[:6]
+    return sales, profit, list(busiest)
+
+def _fit(models, sales, profit, months, engine):
+    forecasts = models._fit_sales_forecasts(sales, profit, months, engine=engine, use_cache=False)
+    return models._summarise_forecasts(sales, profit, forecasts, months, engine)
+
+def test_arima_state_reproduces_statsmodels_forecast(pivots):
+    sales, _, busiest = pivots
+    for product in busiest:
+        series = sales[product].astype(float)
+        direct = np.asarray(ARIMA(series.to_numpy(), order=(1, 1, 1), enforce_stationarity=False,
+                                  enforce_invertibility=False).fit().forecast(steps=24))
+        projected = forecast_paths(_arima_state(series), 24)[0]
+        np.testing.assert_allclose(projected, direct, rtol=1e-7, atol=1e-6)
+
+@pytest.mark.parametrize("engine", FORECAST_ENGINES)
+def test_reprojected_horizon_matches_fit_for_that_horizon(models, pivots, engine):
+    sales, profit, busiest = pivots
+    if engine == "arima":
+        sales, profit = sales[busiest], profit[busiest]
+    trained = _fit(models, sales, profit, 3, engine)
+    direct = _fit(models, sales, profit, 12, engine)
+    projected = models.forecast_horizon(trained, 12)
+
+    assert projected['months_forecasted'] == 12
+    assert list(projected['sales_forecast_data'].index) == list(direct['sales_forecast_data'].index)
+    for key in ('sales_forecast_data', 'profit_forecast_data'):
+        np.testing.assert_allclose(projected[key][direct[key].columns].to_numpy(), direct[key].to_numpy(),
+                                   rtol=1e-7, atol=1e-6)
+    assert projected['sales_forecasts'] == pytest.approx(direct['sales_forecasts'])
+    assert projected['profitability_scores'] == pytest.approx(direct['profitability_scores'])
+    assert projected['best_overall_product'] == direct['best_overall_product']
+    # The trained horizon is the leading part of any longer one
+    np.testing.assert_allclose(projected['sales_forecast_data'].to_numpy()[:3], trained['sales_forecast_data'].to_numpy())
+
+def test_months_query_matches_retraining_for_that_horizon(api):
+    response = api.get("/ai/sales/forecast", params={"months": 6})
+    assert response.status_code == 200
+    served = response.json()["data"]["forecast"]
+    assert served["months_forecasted"] == 6
+    assert len(served["forecast_index"]) == 6
+
+    retrained = Models().create_sales_forecasting_model("./data/products.csv", 6, engine="ar1", use_cache=False)
+    assert served["sales_forecasts"] == pytest.approx(retrained["sales_forecasts"])
+    assert served["profit_forecasts"] == pytest.approx(retrained["profit_forecasts"])
+    assert served["best_overall_product"] == retrained["best_overall_product"]
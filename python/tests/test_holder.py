@@ -0,0 +1,112 @@
+"""ModelHolder: single-flight warm-ups and immutable snapshots"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from holder import ModelHolder
+
+CALLERS = 8
+
+def _ensure_concurrently(holder, warm_up, callers=CALLERS):
+    """Run ensure() from `callers` threads released together; returns each caller's result or exception"""
+    barrier = threading.Barrier(callers)
+
+    def call():
+        barrier.wait()
+        try:
+            return holder.ensure(warm_up, timeout=10)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        return list(pool.map(lambda _: call(), range(callers)))
+
+def test_concurrent_ensure_loads_once():
+    holder = ModelHolder("sales")
+    loads = []
+
+    def warm_up():
+        loads.append(threading.get_ident())
+        # Stay in the warm-up long enough for every other caller to join it
+        time.sleep(0.2)
+        holder.publish({"weights": 1}, tag="v1")
+
+    results = _ensure_concurrently(holder, warm_up)
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+    assert results[0].version == "v1.1"
+    stats = holder.stats()
+    assert stats["warmups"] == 1
+    assert stats["warmups"] + stats["warmup_waiters"] <= CALLERS
+
+def test_failed_warm_up_reaches_every_waiter_and_next_call_retries():
+    holder = ModelHolder("sales")
+    attempts = []
+
+    def failing_warm_up():
+        attempts.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("model file is corrupt")
+
+    results = _ensure_concurrently(holder, failing_warm_up)
+
+    assert len(attempts) == 1
+    assert all(isinstance(result, RuntimeError) and str(result) == "model file is corrupt" for result in results)
+    assert holder.get() is None
+
+    snapshot = holder.ensure(lambda: holder.publish("recovered"))
+    assert snapshot.model == "recovered"
+    assert holder.stats()["warmups"] == 2
+
+def test_ensure_returns_none_when_warm_up_publishes_nothing():
+    holder = ModelHolder("sales")
+    assert holder.ensure(lambda: None) is None
+
+def test_snapshot_is_unchanged_by_later_publish():
+    holder = ModelHolder("sales")
+    first_model = {"weights": [1, 2, 3]}
+    holder.publish(first_model, tag="v1", load_seconds=1.5)
+    reader = holder.get()
+
+    second = holder.publish({"weights": [4, 5, 6]}, tag="v2")
+
+    assert reader.model is first_model
+    assert reader.version == "v1.1"
+    assert reader.generation == 1
+    assert second.version == "v2.2"
+    assert second.generation == 2
+    # A publish without timings keeps the previous load time
+    assert second.load_seconds == 1.5
+    assert holder.get() is second
+
+def test_evict_keeps_readers_snapshot_and_next_ensure_reloads():
+    holder = ModelHolder("sales")
+    reader = holder.publish("old")
+    assert holder.evict()
+    assert not holder.evict()
+    assert reader.model == "old"
+    assert holder.ensure(lambda: holder.publish("new")).model == "new"
+
+def test_waiter_timeout_raises():
+    holder = ModelHolder("sales")
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_warm_up():
+        started.set()
+        release.wait(10)
+        holder.publish("loaded")
+
+    owner = threading.Thread(target=holder.ensure, args=(slow_warm_up,))
+    owner.start()
+    try:
+        assert started.wait(10)
+        with pytest.raises(TimeoutError):
+            holder.ensure(slow_warm_up, timeout=0.05)
+    finally:
+        release.set()
+        owner.join(10)
+    assert holder.get().model == "loaded"
@@ -0,0 +1,100 @@
+"""JobManager: sharing queued duplicates and running one job per kind at a time"""
+import threading
+
+import pytest
+
+from jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobManager
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=2)
+    yield manager
+    manager.shutdown()
+
+def _blocker():
+    """A job body that holds its worker until released"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def run():
+        started.set()
+        release.wait(10)
+        return True
+
+    return run, started, release
+
+def test_identical_submit_returns_the_queued_job(manager):
+    block, started, release = _blocker()
+    train = lambda months, engine: True
+    running, _ = manager.submit("sales", block)
+    assert started.wait(10)
+
+    queued, created = manager.submit("sales", train, 3, engine="ar1")
+    assert created
+    again, created_again = manager.submit("sales", train, 3, engine="ar1")
+    assert again is queued
+    assert not created_again
+    assert queued.status == QUEUED
+    assert queued.to_dict()["queued_behind"] == running.id
+
+    release.set()
+    queued.future.result(10)
+    assert queued.status == SUCCEEDED
+
+def test_running_job_is_not_shared(manager):
+    block, started, release = _blocker()
+    first, _ = manager.submit("sales", block)
+    assert started.wait(10)
+    assert first.status == RUNNING
+
+    second, created = manager.submit("sales", block)
+    assert created
+    assert second is not first
+    release.set()
+    second.future.result(10)
+
+def test_different_arguments_queue_behind_the_active_job(manager):
+    block, started, release = _blocker()
+    order = []
+    first, _ = manager.submit("sales", block)
+    assert started.wait(10)
+
+    second, created = manager.submit("sales", order.append, "months=6")
+    third, _ = manager.submit("sales", order.append, "months=12")
+    assert created
+    assert second.after is first
+    assert third.after is second
+    # Two workers, but nothing of this kind starts until the running job finishes
+    assert not second.future.done()
+    assert second.status == QUEUED
+
+    release.set()
+    third.future.result(10)
+    assert order == ["months=6", "months=12"]
+    assert first.finished_at <= second.started_at <= second.finished_at <= third.started_at
+
+def test_other_kinds_do_not_wait(manager):
+    block, started, release = _blocker()
+    manager.submit("sales", block)
+    assert started.wait(10)
+    other, _ = manager.submit("fashion", lambda: True)
+    assert other.after is None
+    other.future.result(10)
+    assert other.status == SUCCEEDED
+    release.set()
+
+def test_failed_job_does_not_block_the_next(manager):
+    def broken():
+        raise ValueError("no sales data")
+    failed, _ = manager.submit("sales", broken)
+    failed.future.result(10)
+    assert failed.status == FAILED
+    assert failed.error == "no sales data"
+
+    following, _ = manager.submit("sales", lambda: True)
+    following.future.result(10)
+    assert following.status == SUCCEEDED
+
+def test_list_jobs_rejects_a_non_positive_limit(api):
+    assert api.get("/ai/jobs", params={"limit": 0}).status_code == 422
+    assert api.get("/ai/jobs", params={"limit": 1}).status_code == 200
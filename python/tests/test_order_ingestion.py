@@ -0,0 +1,103 @@
+"""Folding API orders into the monthly pivots and replaying them from the order log"""
+import pandas as pd
+import pytest
+
+from model import Models
+from order_log import OrderLog
+
+def _pivots():
+    index = pd.DatetimeIndex(["2024-01-01", "2024-02-01"], name="Order Date")
+    columns = pd.Index(["Chair", "Desk"], name="Product Name")
+    sales = pd.DataFrame([[100.0, 50.0], [80.0, 0.0]], index=index, columns=columns)
+    return sales, sales * 0.3
+
+def test_fold_orders_adds_to_copies_with_new_product_and_month():
+    sales, profit = _pivots()
+    before_sales, before_profit = sales.copy(), profit.copy()
+    orders = [
+        {"date": "2024-02-10", "product_name": "Chair", "sales": 20.0, "profit": 5.0},
+        {"date": "2024-02-20", "product_name": "Lamp", "sales": 30.0, "profit": 9.0},
+        {"date": "2024-03-05", "product_name": "Desk", "sales": 40.0, "profit": 12.0},
+    ]
+    folded_sales, folded_profit, summary = Models.fold_orders(sales, profit, orders)
+
+    # The pivots handed in (possibly held by readers) are untouched
+    pd.testing.assert_frame_equal(sales, before_sales)
+    pd.testing.assert_frame_equal(profit, before_profit)
+
+    assert list(folded_sales.columns) == ["Chair", "Desk", "Lamp"]
+    assert list(folded_sales.index) == list(pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"]))
+    assert folded_sales.loc["2024-02-01", "Chair"] == 100.0
+    assert folded_sales.loc["2024-02-01", "Lamp"] == 30.0
+    assert folded_sales.loc["2024-01-01", "Lamp"] == 0.0
+    assert folded_sales.loc["2024-03-01", "Desk"] == 40.0
+    assert folded_sales.loc["2024-03-01", "Chair"] == 0.0
+    assert folded_profit.loc["2024-02-01", "Chair"] == pytest.approx(24.0 + 5.0)
+    assert summary["accepted"] == 3
+    assert summary["rejected"] == []
+    assert summary["touched_products"] == ["Chair", "Lamp", "Desk"]
+    assert summary["new_products"] == ["Lamp"]
+    assert summary["new_months"] == ["2024-03-01"]
+
+def test_fold_orders_rejects_rows_with_bad_date_or_amount():
+    sales, profit = _pivots()
+    orders = [
+        {"date": "not a date", "product_name": "Chair", "sales": 10.0, "profit": None},
+        {"date": "2024-01-15", "product_name": "Chair", "sales": "lots", "profit": None},
+        {"date": "2024-01-15", "product_name": None, "sales": 10.0, "profit": None},
+        {"date": "2024-01-15", "product_name": "Desk", "sales": 10.0, "profit": 2.0},
+    ]
+    folded_sales, _, summary = Models.fold_orders(sales, profit, orders)
+    assert summary["accepted"] == 1
+    assert summary["rejected"] == [0, 1, 2]
+    assert folded_sales.loc["2024-01-01", "Desk"] == 60.0
+    assert folded_sales.loc["2024-01-01", "Chair"] == 100.0
+
+def test_fold_orders_defaults_missing_profit_to_a_fifth_of_sales():
+    sales, profit = _pivots()
+    orders = [{"date": "2024-01-20", "product_name": "Desk", "sales": 200.0, "profit": None}]
+    _, folded_profit, _ = Models.fold_orders(sales, profit, orders)
+    assert folded_profit.loc["2024-01-01", "Desk"] == pytest.approx(15.0 + 40.0)
+
+def test_apply_sales_orders_marks_every_product_pending_on_a_new_month(workdir):
+    sales, profit = _pivots()
+    model = {"sales_data": sales, "profit_data": profit}
+    same_month, summary = Models().apply_sales_orders(model, [{"date": "2024-02-03", "product_name": "Desk", "sales": 5.0, "profit": 1.0}])
+    assert same_month["pending_products"] == ["Desk"]
+    assert summary["pending_products"] == 1
+
+    new_month, _ = Models().apply_sales_orders(same_month, [{"date": "2024-04-03", "product_name": "Lamp", "sales": 5.0, "profit": 1.0}])
+    assert new_month["pending_products"] == ["Chair", "Desk", "Lamp"]
+    assert model.get("pending_products") is None
+
+def test_read_range_resumes_from_the_returned_offset(tmp_path):
+    log = OrderLog(str(tmp_path / "orders.jsonl"))
+    first = [{"date": "2024-01-02", "product_name": "Chair", "sales": 1.0}]
+    second = [{"date": "2024-01-03", "product_name": "Desk", "sales": 2.0}]
+    other_source = [{"date": "2024-01-04", "product_name": "Lamp", "sales": 3.0}]
+
+    start, end = log.append("csv-a", first)
+    assert start == 0
+    orders, offset = log.read_range("csv-a")
+    assert orders == first
+    assert offset == end == log.size()
+
+    log.append("csv-b", other_source)
+    second_start, second_end = log.append("csv-a", second)
+    orders, resumed = log.read_range("csv-a", offset)
+    assert orders == second
+    assert resumed == second_end == log.size()
+
+    # Nothing new: an empty read that stays put
+    assert log.read_range("csv-a", resumed) == ([], resumed)
+    # A bounded read only returns the batches inside the range
+    assert log.read_range("csv-a", second_start, second_end) == (second, second_end)
+
+def test_read_range_leaves_a_partly_written_batch_for_the_next_read(tmp_path):
+    log = OrderLog(str(tmp_path / "orders.jsonl"))
+    _, end = log.append("csv-a", [{"date": "2024-01-02", "product_name": "Chair", "sales": 1.0}])
+    with open(log.path, "ab") as f:
+        f.write(b'{"source_hash": "csv-a", "orders": [')
+    orders, offset = log.read_range("csv-a")
+    assert len(orders) == 1
+    assert offset == end